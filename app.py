@@ -1,51 +1,158 @@
 #app.py
 
 import streamlit as st
+from datetime import date, datetime, timezone
+import numpy as np
 import pandas as pd
 import plotly.express as px
-from db_logic import connect_to_db, fetch_student_count_by_batch, fetch_interview_data, fetch_interview_sessions, process_performance_data
-
-# Define cached functions
-@st.cache_data
+import plotly.graph_objects as go
+from db_logic import db_connection, fetch_student_count_by_batch, fetch_interview_data, fetch_students, fetch_performance_data, get_session_store, current_year_range, STUDENT_COLUMNS
+from snapshot import snapshot_mode, latest_version, read_snapshot_table, read_manifest, batch_counts_from_frame, performance_data_from_frames, sessions_from_frame
+from data_cache import swr_cache, CACHES, invalidate_all
+from instrumentation import instrumented, timed
+from cube import CubeCache
+from compact import PII_COLUMNS, compact_dataset, compaction_ratio, deep_sizeof
+
+
+# Define cached functions. Database-backed datasets go through the stale-while-revalidate
+# cache in data_cache.py (per-dataset TTLs, overridable with CACHE_TTL_<NAME>). With
+# DASHBOARD_DATA_SOURCE=snapshot the getters serve the latest Parquet snapshot
+# (see snapshot.py) instead of querying Postgres.
 def get_student_counts():
-    conn = connect_to_db()
-    batch_counts = fetch_student_count_by_batch(conn)
-    conn.close()
-    return batch_counts
-
-@st.cache_data
-def get_interview_data():
-    conn = connect_to_db()
-    interview_data = fetch_interview_data(conn)
-    conn.close()
-    return interview_data
-
-@st.cache_data
-def get_students():
-    conn = connect_to_db()
-    cur = conn.cursor()
-    query = """
-    SELECT id, name, email, invited, pool_id, session_id, selected
-    FROM interviews_candidate;
-    """
-    cur.execute(query)
-    results = cur.fetchall()
-    cur.close()
-    conn.close()
-    columns = ["ID", "Name", "Email", "Invited", "Pool ID", "Session ID", "Selected"]
-    return pd.DataFrame(results, columns=columns)
-
-@st.cache_data
+    if snapshot_mode():
+        return batch_counts_from_frame(read_snapshot_table("batch_counts"))
+    return fetch_cached_student_counts()
+
+@swr_cache("student_counts", ttl=3600)
+def fetch_cached_student_counts():
+    with db_connection() as conn:
+        return fetch_student_count_by_batch(conn)
+
+# Pools interviewed in a date range (inclusive dates, the current year by default). A
+# snapshot holds the pools of the year it was built in and ignores the range.
+def get_interview_data(start_date=None, end_date=None):
+    if snapshot_mode():
+        return list(read_snapshot_table("pools").itertuples(index=False, name=None))
+    if start_date is None or end_date is None:
+        start_date, end_date = current_year_range()
+    return fetch_cached_interview_data(start_date, end_date)
+
+# Each range is cached separately. Ranges that ended before today are cached until the
+# data is explicitly refreshed; only ranges reaching today or later are re-queried.
+def interview_range_ttl(ttl, start_date, end_date):
+    return None if end_date < date.today() else ttl
+
+@swr_cache("interview_data", ttl=600, ttl_for=interview_range_ttl)
+def fetch_cached_interview_data(start_date, end_date):
+    with db_connection() as conn:
+        return fetch_interview_data(conn, start_date, end_date)
+
+# Interview date range picked in the sidebar (see main.py); the current year until both
+# ends are picked
+def selected_date_range():
+    selected = st.session_state.get("date_range") or ()
+    if len(selected) == 2:
+        return tuple(selected)
+    return current_year_range()
+
+# Sessions and their aggregates live in the incremental session store rather than
+# st.cache_data: each call only pulls sessions newer than what is already held
 def get_interview_sessions(pool_ids):
-    conn = connect_to_db()
-    sessions = fetch_interview_sessions(conn, pool_ids)
-    conn.close()
-    return sessions
-
-@st.cache_data
-def get_performance_data(interview_sessions):
-    return process_performance_data(interview_sessions)
-
+    if snapshot_mode():
+        return sessions_from_frame(read_snapshot_table("sessions"), pool_ids)
+    store = get_session_store()
+    store.refresh(pool_ids)
+    return store.sessions(pool_ids)
+
+def get_performance_data(pool_ids):
+    if snapshot_mode():
+        return performance_data_from_frames(
+            read_snapshot_table("pool_performance"), read_snapshot_table("sub_category_performance"), pool_ids
+        )
+    store = get_session_store()
+    store.refresh(pool_ids)
+    return store.performance_data(pool_ids)
+
+# Pool and sub-category aggregates computed in Postgres; unlike get_performance_data this
+# never transfers the raw session details
+def get_sub_category_performance(pool_ids):
+    if snapshot_mode():
+        return get_performance_data(pool_ids)
+    return fetch_cached_sub_category_performance(tuple(pool_ids))
+
+@swr_cache("sub_category_performance", ttl=300)
+def fetch_cached_sub_category_performance(pool_ids):
+    with db_connection() as conn:
+        return fetch_performance_data(conn, list(pool_ids))
+
+# Oldest load time among the given datasets. A dataset is a (name, *args) tuple for the
+# cache entry of those arguments, or just a name for a dataset cached without arguments;
+# ("sessions", pool_ids) is the incremental session store's data for those pools.
+def data_as_of(*datasets):
+    if snapshot_mode():
+        return datetime.fromisoformat(read_manifest()["created_at"])
+    datasets = [dataset if isinstance(dataset, tuple) else (dataset,) for dataset in datasets]
+    timestamps = [
+        get_session_store().as_of(*args) if name == "sessions" else CACHES[name].as_of(*args)
+        for name, *args in datasets
+    ]
+    timestamps = [timestamp for timestamp in timestamps if timestamp is not None]
+    return min(timestamps) if timestamps else None
+
+# Cheap token for the data behind a dataset ("sessions" takes the pool ids, other datasets
+# their cache arguments), used to key derived results instead of hashing the data. Read it
+# before the data: a refresh in between then only costs one extra recomputation later.
+def data_version(name, *args):
+    if snapshot_mode():
+        return latest_version()
+    if name == "sessions":
+        return get_session_store().version(*args)
+    return CACHES[name].version(*args)
+
+# Figures built by build() and cached per data_version() token, so reruns and repeat visits
+# on unchanged data skip figure construction. Cached figures are shared between sessions
+# and must not be modified; version=None builds a fresh figure every time.
+def cached_figures(name, version, build):
+    if version is None:
+        return build()
+    return _cached_figures(name, version, build)
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _cached_figures(name, version, _build):
+    return _build()
+
+def render_data_as_of(*datasets):
+    as_of = data_as_of(*datasets)
+    if as_of is not None:
+        st.caption(f"Data as of {as_of.astimezone(timezone.utc):%Y-%m-%d %H:%M:%S} UTC")
+
+# Approximate memory held by each cached dataset in this process, with the size it would
+# have without compact storage, estimated from the sizes recorded at compaction
+def memory_report():
+    datasets = {name: cache.values() for name, cache in CACHES.items()}
+    datasets["sessions"] = get_session_store().retained()
+    datasets["cube"] = _cubes.cubes()
+
+    report = []
+    for name, values in datasets.items():
+        size = deep_sizeof(values)
+        ratio = compaction_ratio(name)
+        report.append({
+            'Dataset': name,
+            'Entries': len(values),
+            'Size (MiB)': size / 2**20,
+            'Uncompacted (MiB)': size * ratio / 2**20 if ratio else None,
+            'Saved (%)': (1 - 1 / ratio) * 100 if ratio else None,
+        })
+    return report
+
+# Drop every cached dataset so the next request reloads from the database
+def invalidate_dashboard_data():
+    invalidate_all()
+    get_session_store().invalidate()
+    _cubes.clear()
+
+@instrumented("Student Distribution by Batch", kind="chart")
 def render_pie_chart(batch_counts):
     labels = list(batch_counts.keys())
     values = list(batch_counts.values())
@@ -72,7 +179,8 @@ def render_pie_chart(batch_counts):
 
     st.plotly_chart(fig)
 
-def plot_candidate_distribution(interview_df, categorized_students_df):
+@instrumented("Student Distribution by Category for Each Interview Pool", kind="chart")
+def build_candidate_distribution_figure(interview_df, categorized_students_df):
     categorized_students_df = categorized_students_df.merge(
         interview_df[['ID', 'Name']],
         left_on='Pool ID',
@@ -83,7 +191,7 @@ def plot_candidate_distribution(interview_df, categorized_students_df):
     categorized_students_df = categorized_students_df.rename(columns={'Name': 'Pool Name'})
 
     # Group by Pool Name and Category to get the total count for each pool and category
-    pool_category_counts = categorized_students_df.groupby(['Pool Name', 'Category']).agg({'Count': 'sum'}).reset_index()
+    pool_category_counts = categorized_students_df.groupby(['Pool Name', 'Category'], observed=True).agg({'Count': 'sum'}).reset_index()
 
     # Calculate total count for each pool to display on top of the bars
     total_pool_counts = pool_category_counts.groupby('Pool Name')['Count'].sum().reset_index()
@@ -103,22 +211,31 @@ def plot_candidate_distribution(interview_df, categorized_students_df):
     # Customize the hover information and text position
     fig_candidates.update_traces(textposition='outside')
 
-    # Add annotations for the total count of each pool, placed above the bars
-    for i, row in total_pool_counts.iterrows():
-        fig_candidates.add_annotation(
-            x=row['Pool Name'],
-            y=row['Count'],
-            text=f'Total: {row["Count"]}',
-            showarrow=False,
-            font=dict(size=12, color='black'),
-            xanchor='center',
-            yanchor='bottom'
-        )
+    # Label each pool's total above its bar with a single text trace rather than one
+    # layout annotation per pool
+    fig_candidates.add_trace(go.Scatter(
+        x=total_pool_counts['Pool Name'],
+        y=total_pool_counts['Count'],
+        text='Total: ' + total_pool_counts['Count'].astype(str),
+        mode='text',
+        textposition='top center',
+        textfont=dict(size=12, color='black'),
+        showlegend=False,
+        hoverinfo='skip'
+    ))
+
+    return fig_candidates
+
+def plot_candidate_distribution(interview_df, categorized_students_df, version=None):
+    fig_candidates = cached_figures(
+        "candidate_distribution", version,
+        lambda: build_candidate_distribution_figure(interview_df, categorized_students_df)
+    )
 
     # Display the plot
     st.plotly_chart(fig_candidates, use_container_width=True)
 
-
+@instrumented()
 def display_categorized_students(students_df, interview_df):
     pool_ids = interview_df['ID'].tolist()
 
@@ -126,7 +243,7 @@ def display_categorized_students(students_df, interview_df):
 
     for pool_id in pool_ids:
         filtered_students = students_df[students_df['Pool ID'] == pool_id]
-        categorized_students = filtered_students.groupby('Category').size().reset_index(name='Count')
+        categorized_students = filtered_students.groupby('Category', observed=True).size().reset_index(name='Count')
         categorized_students['Pool ID'] = pool_id
         categorized_students_list.append(categorized_students)
     
@@ -134,125 +251,213 @@ def display_categorized_students(students_df, interview_df):
 
     return all_categorized_students_df
 
-def categorize_students(students_df):
-    def get_category(email_suffix):
-        if email_suffix.startswith('05'):
-            return 'CSE'
-        elif email_suffix.startswith('54'):
-            return 'AI-DS'
-        elif email_suffix.startswith('04'):
-            return 'ECE'
-        elif email_suffix.startswith('12'):
-            return 'IT'
-        elif email_suffix.startswith('01'):
-            return 'CIVIL'
-        elif email_suffix.startswith('02'):
-            return 'EEE'
-        elif email_suffix.startswith('03'):
-            return 'ME'
-        elif email_suffix.startswith('61'):
-            return 'AI-ML'
-        elif email_suffix.startswith('57'):
-            return 'CS&BS'
-        else:
-            return 'Other'
-
-    def extract_year(email):
-        try:
-            year_prefix = email[:2]
-            return int(year_prefix)
-        except ValueError:
-            return None
-
-    students_df['Year'] = students_df['Email'].apply(lambda x: extract_year(x))
-    students_df['Category'] = students_df['Email'].apply(lambda x: get_category(x.split('@')[0][-4:]))
-    students_df = students_df[students_df['Year'] == 21]
-
-    return students_df
-
-def render_performance_metrics(performance_data, pool_names):
-    df = pd.DataFrame(performance_data)
-    df['Pool Name'] = df['Pool ID'].map(pool_names)
-    
-    if df.empty:
-        st.write("No performance data available.")
-        return
-    
-    st.write(f"**Performance Metrics**")
-
-    # Plot overall average score by pool
-    fig_avg_score = px.bar(
-        df,
-        x='Pool Name',
-        y='Average Score',
-        color='Pool Name',
-        title='Average Score by Interview Pool',
-        labels={'Pool Name': 'Interview Pool', 'Average Score': 'Average Score'},
-        height=500
+# Branch code (first two characters of the last four in the roll number) -> category
+BRANCH_CATEGORIES = {
+    '05': 'CSE',
+    '54': 'AI-DS',
+    '04': 'ECE',
+    '12': 'IT',
+    '01': 'CIVIL',
+    '02': 'EEE',
+    '03': 'ME',
+    '61': 'AI-ML',
+    '57': 'CS&BS',
+}
+
+# Batch (two-digit year prefix of the roll number) shown by default on the candidate pages
+DEFAULT_BATCH_YEAR = 21
+
+# Pass year=None to keep every batch instead of filtering to one
+@instrumented()
+def categorize_students(students_df, year=DEFAULT_BATCH_YEAR, branch_categories=None):
+    branch_categories = BRANCH_CATEGORIES if branch_categories is None else branch_categories
+    categories = list(dict.fromkeys(branch_categories.values())) + ['Other']
+
+    # Parse only the handful of distinct year prefixes and spread them back by factorized code
+    emails = students_df['Email'].astype(str).to_numpy()
+    prefix_codes, prefixes = pd.factorize(np.array([email[:2] for email in emails], dtype=object))
+    prefix_years = pd.to_numeric(pd.Series(prefixes, dtype=object), errors='coerce').to_numpy()
+    years = prefix_years[prefix_codes]
+    in_batch = np.ones(len(emails), dtype=bool) if year is None else years == year
+
+    # Look up branch codes for the selected batch only; unknown codes become 'Other'
+    branch_codes = pd.Series(
+        [email.split('@')[0][-4:][:2] for email in emails[in_batch]],
+        dtype=object
     )
+    category = pd.Categorical(branch_codes.map(branch_categories).fillna('Other'), categories=categories)
 
-    # Add annotations for average score
-    for i, row in df.iterrows():
-        fig_avg_score.add_annotation(
-            x=row['Pool Name'],
-            y=row['Average Score'],
-            text=f'{row["Average Score"]:.2f}',
-            showarrow=False,
-            font=dict(size=12, color='black'),
-            xanchor='center',
-            yanchor='bottom'
-        )
-
-    st.plotly_chart(fig_avg_score, use_container_width=True)
+    # Build a new frame rather than mutating the caller's (possibly cached) one
+    return students_df[in_batch].assign(
+        Year=pd.array(years[in_batch], dtype='Int16') if year is None else year,
+        Category=category
+    )
 
-    # Plot number of students who failed by pool
-    fig_failed = px.bar(
-        df,
-        x='Pool Name',
-        y='Number of Students Failed',
-        color='Pool Name',
-        title='Number of Students Failed by Interview Pool',
-        labels={'Pool Name': 'Interview Pool', 'Number of Students Failed': 'Number of Students Failed'},
-        height=500
+# Categorized candidates of the given pools. Each pool is its own cache entry, so switching
+# pools only loads the new pool, and multi-pool views are assembled from the same entries.
+def get_categorized_students(pool_ids, year=DEFAULT_BATCH_YEAR):
+    if snapshot_mode():
+        candidates_df = read_snapshot_table("candidates")
+        return candidates_df[(candidates_df['Year'] == year) & candidates_df['Pool ID'].isin(list(pool_ids))]
+    frames = get_categorized_students_by_pool(pool_ids, year)
+    if not frames:
+        return categorize_students(pd.DataFrame(columns=STUDENT_COLUMNS), year=year)
+    return pd.concat(frames.values(), ignore_index=True)
+
+# {(pool_id, year): categorized candidates} from the per-pool cache (database mode only)
+def get_categorized_students_by_pool(pool_ids, year=DEFAULT_BATCH_YEAR):
+    return fetch_cached_categorized_students.cache.get_many(
+        [(pool_id, year) for pool_id in pool_ids], load_categorized_students
     )
 
-    # Add annotations for students failed
-    for i, row in df.iterrows():
-        fig_failed.add_annotation(
-            x=row['Pool Name'],
-            y=row['Number of Students Failed'],
-            text=f'{row["Number of Students Failed"]}',
-            showarrow=False,
-            font=dict(size=12, color='black'),
-            xanchor='center',
-            yanchor='bottom'
-        )
+# Candidates categorized once per data load and shared read-only by every session
+@swr_cache("categorized_students", ttl=600)
+def fetch_cached_categorized_students(pool_id, year=DEFAULT_BATCH_YEAR):
+    return load_categorized_students([(pool_id, year)])[(pool_id, year)]
+
+# Bulk loader for missing (pool_id, year) entries: one candidate query and one
+# categorization for all the pools, split into a compact frame per pool (names and
+# emails are dropped once the branch has been derived from the email)
+def load_categorized_students(keys):
+    categorized = {}
+    with db_connection() as conn:
+        for year in dict.fromkeys(year for _, year in keys):
+            pool_ids = [pool_id for pool_id, key_year in keys if key_year == year]
+            students_df = categorize_students(fetch_students(conn, pool_ids), year=year)
+            pools = dict(tuple(students_df.groupby('Pool ID', sort=False)))
+            for pool_id in pool_ids:
+                categorized[(pool_id, year)] = compact_dataset(
+                    "categorized_students", pools.get(pool_id, students_df.iloc[0:0]), drop=PII_COLUMNS
+                )
+    return categorized
+
+_cubes = CubeCache()
+
+# Brings the sessions of the given pools up to date (a no-op while they are fresh)
+def refresh_sessions(pool_ids):
+    if not snapshot_mode():
+        get_session_store().refresh(list(dict.fromkeys(pool_ids)))
+
+# Brings the categorized candidates of the given pools up to date
+def refresh_categorized_students(pool_ids, year=DEFAULT_BATCH_YEAR):
+    if not snapshot_mode():
+        get_categorized_students_by_pool(list(dict.fromkeys(pool_ids)), year)
+
+# Pre-aggregated cube (see cube.py) of the given pools' sessions and candidates, which the
+# Interviews and Test Analysis pages slice for every count, score and histogram they show.
+# Sessions and candidates are brought up to date first (a no-op while they are fresh), and
+# each pool's cube is only rebuilt when the version of its data changes.
+def get_cube(pool_ids, year=DEFAULT_BATCH_YEAR):
+    pool_ids = list(dict.fromkeys(pool_ids))
+    if snapshot_mode():
+        versions = [latest_version()] * len(pool_ids)
+    else:
+        refresh_sessions(pool_ids)
+        refresh_categorized_students(pool_ids, year)
+        versions = [
+            (data_version("sessions", [pool_id]), data_version("categorized_students", pool_id, year))
+            for pool_id in pool_ids
+        ]
+    return _cubes.get(
+        pool_ids, year, versions,
+        lambda stale: (iter_cube_sessions(stale), get_categorized_students(stale, year))
+    )
 
-    st.plotly_chart(fig_failed, use_container_width=True)
+# Sessions for a cube build. Without retained session rows (SESSION_RETAIN_ROWS=false) they
+# are streamed from the database into build_cube() rather than loaded as one list.
+def iter_cube_sessions(pool_ids):
+    if snapshot_mode():
+        return get_interview_sessions(pool_ids)
+    return get_session_store().iter_sessions(pool_ids)
+
+# data_as_of() datasets a cube of these pools is built from
+def cube_sources(pool_ids, year=DEFAULT_BATCH_YEAR):
+    pool_ids = list(dict.fromkeys(pool_ids))
+    return [("sessions", pool_ids)] + [("categorized_students", pool_id, year) for pool_id in pool_ids]
+
+# load_datasets() entries ending in a "cube" dataset for the pools that
+# pool_ids_of(*inputs) returns, inputs being the depends_on datasets. The session refresh
+# and the candidate load run concurrently, so get_cube() finds both fresh.
+def cube_datasets(pool_ids_of, depends_on=(), year=DEFAULT_BATCH_YEAR):
+    depends_on = list(depends_on)
+    return {
+        "cube_sessions": (lambda *inputs: refresh_sessions(pool_ids_of(*inputs)), depends_on),
+        "cube_candidates": (lambda *inputs: refresh_categorized_students(pool_ids_of(*inputs), year), depends_on),
+        "cube": (
+            lambda *inputs: get_cube(pool_ids_of(*inputs[:len(depends_on)]), year),
+            depends_on + ["cube_sessions", "cube_candidates"]
+        ),
+    }
+
+# (column, chart title, bar label format) for each performance metrics chart
+PERFORMANCE_METRIC_CHARTS = [
+    ('Average Score', 'Average Score by Interview Pool', '%{y:.2f}'),
+    ('Number of Students Failed', 'Number of Students Failed by Interview Pool', '%{y}'),
+    ('Number of Students Not Completed', 'Number of Students Not Completed by Interview Pool', '%{y}'),
+]
+
+def build_performance_figures(performance_data, pool_names):
+    df = pd.DataFrame(performance_data)
+    if df.empty:
+        return []
+    df['Pool Name'] = df['Pool ID'].map(pool_names)
 
-    # Plot number of students who haven't completed the interview by pool
-    fig_not_completed = px.bar(
-        df,
-        x='Pool Name',
-        y='Number of Students Not Completed',
-        color='Pool Name',
-        title='Number of Students Not Completed by Interview Pool',
-        labels={'Pool Name': 'Interview Pool', 'Number of Students Not Completed': 'Number of Students Not Completed'},
-        height=500
+    figures = []
+    for column, title, label_format in PERFORMANCE_METRIC_CHARTS:
+        with timed(title, kind="chart"):
+            fig = px.bar(
+                df,
+                x='Pool Name',
+                y=column,
+                color='Pool Name',
+                title=title,
+                labels={'Pool Name': 'Interview Pool', column: column},
+                height=500
+            )
+
+            # Value labels above the bars, drawn by the bar traces themselves instead of
+            # one layout annotation per pool
+            fig.update_traces(
+                texttemplate=label_format,
+                textposition='outside',
+                textfont=dict(size=12, color='black'),
+                cliponaxis=False
+            )
+        figures.append(fig)
+
+    # Median score with the P10-P90 range of each pool, when the data carries quantiles
+    # (Cube.pool_performance does)
+    if {'Median Score', 'P10 Score', 'P90 Score'} <= set(df.columns):
+        with timed('Score Spread by Interview Pool', kind="chart"):
+            df['P90 Above Median'] = df['P90 Score'] - df['Median Score']
+            df['P10 Below Median'] = df['Median Score'] - df['P10 Score']
+            fig = px.scatter(
+                df,
+                x='Pool Name',
+                y='Median Score',
+                color='Pool Name',
+                error_y='P90 Above Median',
+                error_y_minus='P10 Below Median',
+                hover_data={'P10 Score': ':.1f', 'Median Score': ':.1f', 'P90 Score': ':.1f',
+                            'P90 Above Median': False, 'P10 Below Median': False},
+                title='Score Spread by Interview Pool (median, 10th to 90th percentile)',
+                labels={'Pool Name': 'Interview Pool'},
+                height=500
+            )
+            fig.update_traces(marker=dict(size=12))
+        figures.append(fig)
+    return figures
+
+def render_performance_metrics(performance_data, pool_names, version=None):
+    figures = cached_figures(
+        "performance_metrics", version, lambda: build_performance_figures(performance_data, pool_names)
     )
 
-    # Add annotations for students not completed
-    for i, row in df.iterrows():
-        fig_not_completed.add_annotation(
-            x=row['Pool Name'],
-            y=row['Number of Students Not Completed'],
-            text=f'{row["Number of Students Not Completed"]}',
-            showarrow=False,
-            font=dict(size=12, color='black'),
-            xanchor='center',
-            yanchor='bottom'
-        )
-
-    st.plotly_chart(fig_not_completed, use_container_width=True)
+    if not figures:
+        st.write("No performance data available.")
+        return
 
+    st.write(f"**Performance Metrics**")
 
+    for fig in figures:
+        st.plotly_chart(fig, use_container_width=True)
@@ -0,0 +1,215 @@
+#benchmarks/bench.py
+
+# Benchmarks for the db_logic fetchers, the processing helpers and whole pages on
+# synthetic data, reporting wall time and peak traced memory per size.
+#
+#   python -m benchmarks.bench --sizes 1000 10000 100000
+#   python -m benchmarks.bench --backend postgres --load --sizes 1000 1000000
+#   python -m benchmarks.bench --compare benchmarks/results/<earlier>.json
+#
+# The memory backend runs everything in-process: functions get the generated rows
+# directly and pages read a snapshot built from them (DASHBOARD_DATA_SOURCE=snapshot).
+# The postgres backend uses the DB_* settings; with --load it TRUNCATES the interview
+# tables and bulk-loads synthetic rows, so only point it at a throwaway database.
+
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+PAGES = ["Home", "Interviews", "Overall Analysis", "Test Analysis"]
+
+sys.path.insert(0, ROOT)
+
+import db_logic
+import snapshot
+from app import categorize_students, display_categorized_students, invalidate_dashboard_data
+from benchmarks.synthetic import generate_dataset, load_into_postgres
+from cube import build_cube
+from page.test_analysis import downsample_scores, get_branch_performance_data
+
+def measure(fn, repeat=3, setup=None):
+    # Best-of-N wall time without tracing, then one traced run for peak memory
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+def function_benchmarks(dataset):
+    sessions = dataset["sessions"]
+    candidates = dataset["candidates"]
+    interview_df = pd.DataFrame(dataset["pools"], columns=["ID", "Name", "Invitation", "Created On", "Num Candidates", "End Time", "Start Time"])
+    categorized = categorize_students(candidates)
+    scores = pd.DataFrame(sessions, columns=["ID", "Pool ID", "Performance", "Is Completed", "Details"])
+    cube = build_cube(sessions, categorized)
+    pool_ids = interview_df["ID"].tolist()
+    return {
+        "count_students_by_batch": lambda: db_logic.count_students_by_batch(dataset["users"]),
+        "process_performance_data[python]": lambda: db_logic.process_performance_data(sessions, engine="python"),
+        "process_performance_data[vectorized]": lambda: db_logic.process_performance_data(sessions, engine="vectorized"),
+        "SessionAggregator.update": lambda: db_logic.SessionAggregator().update(sessions).performance_data(),
+        "categorize_students": lambda: categorize_students(candidates),
+        "display_categorized_students": lambda: display_categorized_students(categorized, interview_df),
+        "get_branch_performance_data": lambda: get_branch_performance_data(sessions, categorized),
+        "downsample_scores": lambda: downsample_scores(scores, 10_000),
+        "build_cube": lambda: build_cube(sessions, categorized),
+        # Uncached slices: totals(), as a fresh cube would compute them on first use
+        "Cube.totals[pool]": lambda: cube.totals(["Pool ID"], pool_ids=pool_ids),
+        "Cube.totals[branch]": lambda: cube.totals(["Category"], pool_ids=pool_ids[:1]),
+    }
+
+def query_benchmarks():
+    def run(fetcher, *args, **kwargs):
+        def call():
+            with db_logic.db_connection() as conn:
+                return fetcher(conn, *args, **kwargs)
+        return call
+
+    with db_logic.db_connection() as conn:
+        pool_ids = [row[0] for row in db_logic.fetch_interview_data(conn)]
+    return {
+        "fetch_student_count_by_batch[server]": run(db_logic.fetch_student_count_by_batch),
+        "fetch_student_count_by_batch[python]": run(db_logic.fetch_student_count_by_batch, server_side=False),
+        "fetch_interview_data": run(db_logic.fetch_interview_data),
+        "fetch_students[cursor]": run(db_logic.fetch_students, method="cursor"),
+        "fetch_students[copy]": run(db_logic.fetch_students, method="copy"),
+        "fetch_interview_sessions[cursor]": run(db_logic.fetch_interview_sessions, pool_ids, method="cursor"),
+        "fetch_interview_sessions[copy]": run(db_logic.fetch_interview_sessions, pool_ids, method="copy"),
+        "stream_performance_data": run(db_logic.stream_performance_data, pool_ids),
+        "fetch_performance_data": run(db_logic.fetch_performance_data, pool_ids),
+    }
+
+def page_benchmarks():
+    from streamlit.testing.v1 import AppTest
+
+    def render(page):
+        def run():
+            app_test = AppTest.from_file(os.path.join(ROOT, "main.py"), default_timeout=600)
+            app_test.run()
+            if page != "Home":
+                app_test.sidebar.radio[0].set_value(page).run()
+            if app_test.exception:
+                raise RuntimeError(app_test.exception[0].value)
+        return run
+    return {page: render(page) for page in PAGES}
+
+def run_benchmarks(sizes, backend, load, repeat, seed):
+    results = []
+
+    def record(kind, size, benchmarks, setup=None):
+        for name, fn in benchmarks.items():
+            try:
+                seconds, peak = measure(fn, repeat, setup)
+                results.append({"kind": kind, "name": name, "size": size, "seconds": seconds, "peak_bytes": peak})
+                print(f"{kind:>8} {size:>10} {name:<40} {seconds * 1000:10.1f} ms {peak / 2**20:10.1f} MiB")
+            except Exception as exc:
+                results.append({"kind": kind, "name": name, "size": size, "error": str(exc)})
+                print(f"{kind:>8} {size:>10} {name:<40} failed: {exc}")
+
+    with tempfile.TemporaryDirectory() as snapshot_root:
+        for size in sizes:
+            dataset = generate_dataset(size, seed=seed)
+            record("function", size, function_benchmarks(dataset))
+
+            if backend == "postgres":
+                if load:
+                    with db_logic.db_connection() as conn:
+                        load_into_postgres(conn, size, seed=seed)
+                record("query", size, query_benchmarks())
+                os.environ["DASHBOARD_DATA_SOURCE"] = "database"
+            else:
+                # In-process stand-in for Postgres: pages read a snapshot of the synthetic rows
+                snapshot.SNAPSHOT_DIR = os.path.join(snapshot_root, str(size))
+                os.makedirs(snapshot.SNAPSHOT_DIR)
+                batch_counts = db_logic.count_students_by_batch(dataset["users"])
+                snapshot.write_snapshot(snapshot.snapshot_datasets(
+                    batch_counts, dataset["pools"], dataset["candidates"], dataset["sessions"]
+                ))
+                os.environ["DASHBOARD_DATA_SOURCE"] = "snapshot"
+
+            # Pages are timed cold: every cached dataset is dropped before each render
+            record("page", size, page_benchmarks(), setup=invalidate_dashboard_data)
+            del dataset
+
+    return results
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def save_results(results, label, backend):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    created_at = datetime.now(timezone.utc)
+    report = {
+        "label": label,
+        "git_revision": git_revision(),
+        "created_at": created_at.isoformat(),
+        "backend": backend,
+        "python": platform.python_version(),
+        "results": results,
+    }
+    path = os.path.join(RESULTS_DIR, f"{created_at:%Y%m%dT%H%M%SZ}-{label or report['git_revision'] or 'run'}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+def compare(baseline_path, results):
+    with open(baseline_path) as f:
+        baseline = {(r["kind"], r["name"], r["size"]): r for r in json.load(f)["results"] if "seconds" in r}
+    print(f"\nCompared with {baseline_path}:")
+    for result in results:
+        previous = baseline.get((result["kind"], result["name"], result["size"]))
+        if previous is None or "seconds" not in result:
+            continue
+        speedup = previous["seconds"] / result["seconds"] if result["seconds"] else float("inf")
+        memory = result["peak_bytes"] / previous["peak_bytes"] if previous["peak_bytes"] else float("nan")
+        print(f"{result['kind']:>8} {result['size']:>10} {result['name']:<40} {speedup:6.2f}x faster {memory:6.2f}x memory")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Skill-2030 data loading and processing")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000], help="Number of interview sessions")
+    parser.add_argument("--backend", choices=["memory", "postgres"], default="memory")
+    parser.add_argument("--load", action="store_true", help="Truncate and bulk-load synthetic rows into the postgres backend")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", help="Name for the saved results file (defaults to the git revision)")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.backend, args.load, args.repeat, args.seed)
+    print(f"\nSaved results to {save_results(results, args.label, args.backend)}")
+    if args.compare:
+        compare(args.compare, results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#benchmarks/synthetic.py
+
+# Synthetic users_user, interviews_interview, interviews_assignmentpool,
+# interviews_interviewsession and interviews_candidate data with the shapes db_logic
+# expects: roll-number emails with batch and branch codes, sessions with sub-category
+# details JSON, and one candidate per session. Rows are generated in chunks so the
+# Postgres loader can go up to ~10M sessions; generate_dataset() materializes everything
+# in memory and is meant for sizes up to a few hundred thousand.
+
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from app import BRANCH_CATEGORIES
+
+SUB_CATEGORIES = ["aptitude", "coding", "communication", "technical"]
+BATCH_PREFIXES = ["17", "18", "19", "20", "21", "22", "23"]
+BRANCH_CODES = list(BRANCH_CATEGORIES) + ["99"]  # "99" exercises the 'Other' category
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users_user (id bigserial PRIMARY KEY, email text NOT NULL);
+CREATE TABLE IF NOT EXISTS interviews_interview (id bigserial PRIMARY KEY, org_id integer, timestamp timestamptz);
+CREATE TABLE IF NOT EXISTS interviews_assignmentpool (
+    id bigserial PRIMARY KEY, name text, invitation text, created_on timestamptz,
+    num_candidates integer, end_time timestamptz, start_time timestamptz
+);
+CREATE TABLE IF NOT EXISTS interviews_interviewsession (
+    id bigserial PRIMARY KEY, interview_id bigint, pool_id bigint, performance double precision,
+    is_completed boolean, details jsonb, updated timestamptz DEFAULT now()
+);
+CREATE TABLE IF NOT EXISTS interviews_candidate (
+    id bigserial PRIMARY KEY, name text, email text, invited boolean, pool_id bigint,
+    session_id bigint, selected boolean
+);
+CREATE INDEX IF NOT EXISTS interviews_interviewsession_pool_id ON interviews_interviewsession (pool_id);
+CREATE INDEX IF NOT EXISTS interviews_interview_timestamp ON interviews_interview (timestamp);
+"""
+
+TABLES = ["users_user", "interviews_interview", "interviews_assignmentpool", "interviews_interviewsession", "interviews_candidate"]
+
+def default_num_pools(num_sessions):
+    return int(min(200, max(2, num_sessions // 500)))
+
+def generate_pools(num_pools, seed=0):
+    rng = np.random.default_rng(seed)
+    now = datetime.now(timezone.utc)
+    year_start = datetime(now.year, 1, 1, tzinfo=timezone.utc)
+    interviews, pools = [], []
+    for pool_id in range(1, num_pools + 1):
+        # Within the current year, which is what the dashboard shows
+        start = year_start + (now - year_start) * float(rng.random())
+        interviews.append((pool_id, 1, start))
+        pools.append((
+            pool_id, f"Pool {pool_id}", f"Assessment drive {pool_id}", start - timedelta(days=7),
+            int(rng.integers(10, 500)), start + timedelta(hours=3), start
+        ))
+    return interviews, pools
+
+def _emails(rng, size, index_offset):
+    prefixes = rng.choice(BATCH_PREFIXES, size)
+    lateral = np.where(rng.random(size) < 0.1, "pa5a", "pa1a")
+    codes = rng.choice(BRANCH_CODES, size)
+    serials = (np.arange(size) + index_offset) % 100
+    return [f"{p}{l}{c}{s:02d}@vishnu.edu.in" for p, l, c, s in zip(prefixes, lateral, codes, serials)]
+
+# Yields (sessions, candidates) chunks. sessions are db_logic session tuples
+# (id, pool_id, performance, is_completed, details) and candidates a frame shaped
+# like db_logic.fetch_students.
+def iter_session_chunks(num_sessions, num_pools, seed=0, chunk_size=100_000):
+    rng = np.random.default_rng(seed + 1)
+    for start in range(0, num_sessions, chunk_size):
+        size = min(chunk_size, num_sessions - start)
+        session_ids = np.arange(start + 1, start + size + 1)
+        pool_ids = rng.integers(1, num_pools + 1, size)
+        performance = np.round(np.clip(rng.normal(68, 18, size), 0, 100), 2)
+        is_completed = rng.random(size) < 0.85
+        sub_scores = np.round(np.clip(rng.normal(65, 20, (size, len(SUB_CATEGORIES))), 0, 100), 2)
+        sub_present = rng.random((size, len(SUB_CATEGORIES))) < 0.8
+
+        sessions = [
+            (int(session_id), int(pool_id), float(score), bool(completed), {
+                sub_category: {"score": float(sub_score)}
+                for sub_category, sub_score, present in zip(SUB_CATEGORIES, scores, present_row) if present
+            })
+            for session_id, pool_id, score, completed, scores, present_row
+            in zip(session_ids, pool_ids, performance, is_completed, sub_scores, sub_present)
+        ]
+
+        # ~90% of sessions have a candidate row
+        has_candidate = rng.random(size) < 0.9
+        candidate_count = int(has_candidate.sum())
+        candidates = pd.DataFrame({
+            "ID": session_ids[has_candidate],
+            "Name": [f"Student {i}" for i in session_ids[has_candidate]],
+            "Email": _emails(rng, candidate_count, start),
+            "Invited": True,
+            "Pool ID": pool_ids[has_candidate],
+            "Session ID": session_ids[has_candidate],
+            "Selected": rng.random(candidate_count) < 0.2,
+        })
+        yield sessions, candidates
+
+# Everything in memory: interview rows, pool rows, session tuples, candidates and user emails
+def generate_dataset(num_sessions, num_pools=None, seed=0):
+    num_pools = num_pools or default_num_pools(num_sessions)
+    interviews, pools = generate_pools(num_pools, seed)
+    sessions, candidate_frames = [], []
+    for session_chunk, candidate_chunk in iter_session_chunks(num_sessions, num_pools, seed):
+        sessions.extend(session_chunk)
+        candidate_frames.append(candidate_chunk)
+    candidates = pd.concat(candidate_frames, ignore_index=True)
+
+    # Every candidate is a user, plus non-student accounts the batch count must skip
+    rng = np.random.default_rng(seed + 2)
+    extra = max(1, num_sessions // 10)
+    users = candidates["Email"].tolist() + _emails(rng, extra, 0) + [f"staff{i}@example.com" for i in range(extra)]
+    return {"interviews": interviews, "pools": pools, "sessions": sessions, "candidates": candidates, "users": users}
+
+def _copy(cur, table, columns, rows):
+    buffer = io.StringIO()
+    pd.DataFrame(rows, columns=columns).to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+# Create the schema (if needed) in a throwaway database and bulk-load a synthetic dataset
+# with COPY, chunk by chunk. Existing rows in these tables are removed first.
+def load_into_postgres(conn, num_sessions, num_pools=None, seed=0, chunk_size=100_000):
+    num_pools = num_pools or default_num_pools(num_sessions)
+    cur = conn.cursor()
+    cur.execute(SCHEMA)
+    cur.execute(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY;")
+
+    interviews, pools = generate_pools(num_pools, seed)
+    _copy(cur, "interviews_interview", ["id", "org_id", "timestamp"], interviews)
+    _copy(cur, "interviews_assignmentpool",
+          ["id", "name", "invitation", "created_on", "num_candidates", "end_time", "start_time"], pools)
+
+    rng = np.random.default_rng(seed + 2)
+    for sessions, candidates in iter_session_chunks(num_sessions, num_pools, seed, chunk_size):
+        _copy(cur, "interviews_interviewsession",
+              ["id", "interview_id", "pool_id", "performance", "is_completed", "details"],
+              # Pool ids double as interview ids: one interview per pool
+              [(s[0], s[1], s[1], s[2], s[3], json.dumps(s[4])) for s in sessions])
+        _copy(cur, "interviews_candidate",
+              ["id", "name", "email", "invited", "pool_id", "session_id", "selected"],
+              candidates[["ID", "Name", "Email", "Invited", "Pool ID", "Session ID", "Selected"]].itertuples(index=False, name=None))
+        _copy(cur, "users_user", ["email"], [(email,) for email in candidates["Email"]])
+
+    extra = max(1, num_sessions // 10)
+    _copy(cur, "users_user", ["email"], [(email,) for email in _emails(rng, extra, 0) + [f"staff{i}@example.com" for i in range(extra)]])
+
+    for table in TABLES:
+        cur.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 1)) FROM {table};")
+    cur.execute(f"ANALYZE {', '.join(TABLES)};")
+    conn.commit()
+    cur.close()
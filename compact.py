@@ -0,0 +1,113 @@
+#compact.py
+
+# Compact in-memory storage for cached datasets. Every dashboard process holds its own copy
+# of each cached frame and of the session store, so with COMPACT_STORAGE on (the default)
+# cached candidate frames drop the PII columns once the branch has been derived and keep
+# the rest in the smallest dtypes that hold them, and retained sessions keep only the
+# sub-category scores extracted from their details JSON. Each compaction records the size
+# before and after, from which the Diagnostics page estimates the savings per dataset.
+
+import json
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+COMPACT_STORAGE = os.getenv("COMPACT_STORAGE", "true").lower() not in ("0", "false", "no")
+
+# Columns dropped from cached candidate frames once categorize_students has used them
+PII_COLUMNS = ["Name", "Email"]
+
+# Items measured when estimating the size of a large list, tuple or dict
+SIZE_SAMPLE = 200
+
+_lock = threading.Lock()
+_compactions = {}  # dataset -> [bytes before, bytes after] over all compactions
+
+def record_compaction(dataset, before, after):
+    with _lock:
+        totals = _compactions.setdefault(dataset, [0, 0])
+        totals[0] += before
+        totals[1] += after
+
+# Bytes before / bytes after over everything compacted for a dataset, None if unknown
+def compaction_ratio(dataset):
+    with _lock:
+        before, after = _compactions.get(dataset, (0, 0))
+    return before / after if after else None
+
+def reset():
+    with _lock:
+        _compactions.clear()
+
+# Approximate deep size in bytes. Frames report their own (deep) memory usage; containers
+# larger than SIZE_SAMPLE are extrapolated from evenly spaced items, and objects shared
+# between items (such as interned strings) are counted once per reference.
+def deep_sizeof(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + _sampled(list(value.items()), lambda item: deep_sizeof(item[0]) + deep_sizeof(item[1]))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + _sampled(list(value), deep_sizeof)
+    if hasattr(value, "__dict__") and not isinstance(value, type):
+        return sys.getsizeof(value) + deep_sizeof(vars(value))
+    return sys.getsizeof(value)
+
+def _sampled(items, size):
+    if len(items) <= SIZE_SAMPLE:
+        return sum(size(item) for item in items)
+    positions = np.linspace(0, len(items) - 1, SIZE_SAMPLE).astype(int)
+    return sum(size(items[position]) for position in positions) * len(items) // SIZE_SAMPLE
+
+# Copy of df without the drop columns, with integer columns downcast, whole-number float
+# columns (integer ids with NULLs) as nullable integers, object columns holding only
+# booleans as nullable booleans and the categorical columns as categories
+def compact_frame(df, drop=(), categorical=()):
+    df = df.drop(columns=[column for column in drop if column in df.columns])
+    columns = {}
+    for column in df.columns:
+        series = df[column]
+        if column in categorical:
+            if not isinstance(series.dtype, pd.CategoricalDtype):
+                columns[column] = series.astype("category")
+        elif pd.api.types.is_bool_dtype(series.dtype):
+            continue
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            columns[column] = pd.to_numeric(series, downcast="integer")
+        elif pd.api.types.is_float_dtype(series.dtype):
+            values = series.dropna()
+            if len(values) and (values == np.floor(values)).all() and (values.abs() < 2 ** 63).all():
+                downcast = pd.to_numeric(values, downcast="integer")
+                columns[column] = downcast.reindex(series.index).astype(downcast.dtype.name.capitalize())
+        elif series.dtype == object and len(series) and series.map(lambda value: value is None or isinstance(value, bool)).all():
+            columns[column] = series.astype("boolean")
+    return df.assign(**columns) if columns else df
+
+# compact_frame() for a cached dataset when COMPACT_STORAGE is on, recording the savings
+def compact_dataset(dataset, df, drop=(), categorical=()):
+    if not COMPACT_STORAGE:
+        return df
+    compacted = compact_frame(df, drop=drop, categorical=categorical)
+    record_compaction(dataset, deep_sizeof(df), deep_sizeof(compacted))
+    return compacted
+
+# Session tuple reduced to what the dashboard derives from it: the completion flag as a
+# bool and, of the details JSON, only the sub-category scores (in the same
+# {sub_category: {'score': ...}} shape, so every consumer reads it unchanged)
+def compact_session(session):
+    session_id, pool_id, performance, is_completed, details = session[:5]
+    if isinstance(details, str):
+        details = json.loads(details)
+    scores = {
+        sys.intern(sub_category): {'score': sub_data['score']}
+        for sub_category, sub_data in (details or {}).items()
+        if isinstance(sub_data, dict) and 'score' in sub_data
+    }
+    return (session_id, pool_id, performance, bool(is_completed), scores)
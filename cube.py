@@ -0,0 +1,379 @@
+#cube.py
+
+# Pre-aggregated interview cube: sessions grouped by pool, branch category, sub-category
+# and completion status, with session counts, score sums, failures, the first session id
+# and score histogram buckets, plus candidate counts per pool and category. app.get_cube()
+# builds it once per pool and data version, and the pages read every aggregate they chart
+# from it, so a rerun only slices a small frame instead of regrouping raw sessions.
+#
+# The histogram buckets double as a mergeable quantile summary: summing the buckets of any
+# set of cells gives the histogram of their union, from which medians and percentiles are
+# interpolated, so memory per cell stays fixed and pools combine without rescanning
+# sessions. Estimates are within one bucket width (100 / CUBE_HISTOGRAM_BUCKETS) of the
+# exact value.
+
+import itertools
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import instrumented
+
+# Category of sessions with no candidate in the selected batch, and the sub-category
+# holding each session's overall score
+UNMATCHED = "(no candidate)"
+OVERALL = "(overall)"
+
+FAIL_THRESHOLD = 70
+HISTOGRAM_BUCKETS = int(os.getenv("CUBE_HISTOGRAM_BUCKETS", 50))
+# Scores outside this range are counted in the first or last bucket
+SCORE_RANGE = (0, 100)
+
+DIMENSIONS = ["Pool ID", "Category", "Sub-Category", "Completed"]
+BUCKET_COLUMNS = [f"Bucket {bucket}" for bucket in range(HISTOGRAM_BUCKETS)]
+# Count is every session (or sub-category entry), Scored only those with a non-NULL score,
+# which alone make up Score Sum, Failed and the histogram
+MEASURES = ["Count", "Scored", "Score Sum", "Failed", "First Session"] + BUCKET_COLUMNS
+# Column -> quantile estimated from the histogram buckets
+QUANTILES = {"Median Score": 0.5, "P10 Score": 0.1, "P90 Score": 0.9}
+
+def bucket_edges():
+    return np.linspace(SCORE_RANGE[0], SCORE_RANGE[1], HISTOGRAM_BUCKETS + 1)
+
+# Quantile q of each row of a (groups x buckets) count array, interpolated linearly within
+# the bucket it falls in; NaN for empty rows
+def histogram_quantiles(counts, q, edges=None):
+    edges = bucket_edges() if edges is None else edges
+    counts = np.asarray(counts, dtype=float).reshape(-1, len(edges) - 1)
+    cumulative = np.cumsum(counts, axis=1)
+    target = q * cumulative[:, -1]
+    bucket = np.minimum((cumulative < target[:, None]).sum(axis=1), counts.shape[1] - 1)
+    rows = np.arange(len(counts))
+    in_bucket = counts[rows, bucket]
+    below = cumulative[rows, bucket] - in_bucket
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fraction = np.where(in_bucket > 0, (target - below) / in_bucket, 0.0)
+    values = edges[bucket] + fraction * (edges[bucket + 1] - edges[bucket])
+    return np.where(cumulative[:, -1] > 0, values, np.nan)
+
+# Average as db_logic.process_performance_data reports it: None when nothing was scored
+def _average(value):
+    return None if pd.isna(value) else float(value)
+
+def _empty_cells():
+    index = pd.MultiIndex.from_arrays([[] for _ in DIMENSIONS], names=DIMENSIONS)
+    return pd.DataFrame(
+        {column: pd.Series([], dtype="float64" if column == "Score Sum" else "int64") for column in MEASURES},
+        index=index
+    )
+
+def _empty_candidates():
+    return pd.Series([], dtype="int64", index=pd.MultiIndex.from_tuples([], names=["Pool ID", "Category"]), name="Count")
+
+class Cube:
+    def __init__(self, cells, candidates, version=None):
+        self.cells = cells  # measures indexed by DIMENSIONS
+        self.candidates = candidates  # candidate counts indexed by (Pool ID, Category)
+        self.version = version  # data token the cube was built for, for keying derived caches
+        self._slices = {}  # memoized slicing results; a cube is never modified once built
+
+    # Result of build(*args), computed once per cube; callers must not modify it
+    def _memoized(self, key, build, *args):
+        if key not in self._slices:
+            self._slices[key] = build(*args)
+        return self._slices[key]
+
+    @classmethod
+    def concat(cls, cubes, version=None):
+        cubes = list(cubes)
+        if not cubes:
+            return cls(_empty_cells(), _empty_candidates(), version)
+        return cls(
+            pd.concat([cube.cells for cube in cubes]),
+            pd.concat([cube.candidates for cube in cubes]),
+            version
+        )
+
+    # {pool_id: cube of that pool alone} for the given pools
+    def split(self, pool_ids):
+        cells = dict(tuple(self.cells.groupby(level="Pool ID", sort=False)))
+        candidates = dict(tuple(self.candidates.groupby(level="Pool ID", sort=False)))
+        return {
+            pool_id: Cube(cells.get(pool_id, self.cells.iloc[0:0]), candidates.get(pool_id, self.candidates.iloc[0:0]))
+            for pool_id in pool_ids
+        }
+
+    # Cells matching the filters; None means no filter on that dimension. Session-level
+    # scores are selected by default; pass sub_categories=None for every row.
+    def select(self, pool_ids=None, categories=None, sub_categories=(OVERALL,), completed=None):
+        cells = self.cells
+        mask = np.ones(len(cells), dtype=bool)
+        for level, values in (("Pool ID", pool_ids), ("Category", categories), ("Sub-Category", sub_categories)):
+            if values is not None:
+                mask &= cells.index.get_level_values(level).isin(list(values))
+        if completed is not None:
+            mask &= cells.index.get_level_values("Completed") == completed
+        return cells[mask]
+
+    # Measures summed over everything but the `by` dimensions, plus Not Completed, Average
+    # Score and the QUANTILES. Groups keep the order in which they were first built.
+    def totals(self, by, **filters):
+        cells = self.select(**filters)
+        cells = cells.assign(**{
+            "Not Completed": cells["Count"].where(~cells.index.get_level_values("Completed").astype(bool), 0)
+        })
+        aggregations = {column: "sum" for column in ["Count", "Scored", "Score Sum", "Failed", "Not Completed"] + BUCKET_COLUMNS}
+        aggregations["First Session"] = "min"
+        totals = cells.groupby(level=by, sort=False).agg(aggregations)
+        totals["Average Score"] = totals["Score Sum"] / totals["Scored"].where(totals["Scored"] > 0)
+        buckets = totals[BUCKET_COLUMNS].to_numpy()
+        for column, q in QUANTILES.items():
+            totals[column] = histogram_quantiles(buckets, q)
+        return totals
+
+    def sub_category_names(self):
+        names = self.cells.index.get_level_values("Sub-Category").unique()
+        return [name for name in names if name != OVERALL]
+
+    # Same structure as db_logic.process_performance_data plus the QUANTILES, with pools in
+    # pool_ids order
+    def pool_performance(self, pool_ids):
+        pool_ids = tuple(pool_ids)
+        return self._memoized(("pool_performance", pool_ids), self._pool_performance, pool_ids)
+
+    def _pool_performance(self, pool_ids):
+        pools = self.totals(["Pool ID"], pool_ids=pool_ids)
+        sub_categories = self.totals(
+            ["Pool ID", "Sub-Category"], pool_ids=pool_ids, sub_categories=self.sub_category_names()
+        ).sort_values("First Session", kind="stable")
+
+        sub_category_averages = {pool_id: {} for pool_id in pools.index}
+        for (pool_id, sub_category), row in zip(sub_categories.index, sub_categories.to_dict('records')):
+            sub_category_averages[pool_id][sub_category] = {
+                'Average Score': _average(row["Average Score"]),
+                'Number of Students Failed': int(row["Failed"]),
+                'Number of Students Not Completed': int(row["Not Completed"]),
+                **{column: float(row[column]) for column in QUANTILES},
+            }
+
+        return [
+            {
+                'Pool ID': pool_id,
+                'Average Score': _average(pools.at[pool_id, "Average Score"]),
+                'Number of Students Failed': int(pools.at[pool_id, "Failed"]),
+                'Number of Students Not Completed': int(pools.at[pool_id, "Not Completed"]),
+                **{column: float(pools.at[pool_id, column]) for column in QUANTILES},
+                'Sub-Category Averages': sub_category_averages[pool_id],
+            }
+            for pool_id in pool_ids if pool_id in pools.index
+        ]
+
+    # Same structure as page.test_analysis.get_branch_performance_data plus the QUANTILES:
+    # branches in order of their first session, sessions without a candidate left out
+    def branch_performance(self, pool_ids):
+        pool_ids = tuple(pool_ids)
+        return self._memoized(("branch_performance", pool_ids), self._branch_performance, pool_ids)
+
+    def _branch_performance(self, pool_ids):
+        branches = self.totals(["Category"], pool_ids=pool_ids)
+        branches = branches.drop(index=UNMATCHED, errors="ignore").sort_values("First Session", kind="stable")
+        return [
+            {
+                'Category': category,
+                'Average Score': round(float(row["Average Score"]), 1),
+                'Number of Students Failed': int(row["Failed"]),
+                'Number of Students Not Completed': int(row["Not Completed"]),
+                **{column: round(float(row[column]), 1) for column in QUANTILES},
+            }
+            for category, row in zip(branches.index, branches.to_dict('records'))
+        ]
+
+    # (bucket edges, session counts per bucket) for the selected cells
+    def histogram(self, **filters):
+        cells = self.select(**filters)
+        return bucket_edges(), cells[BUCKET_COLUMNS].to_numpy(dtype=np.int64).sum(axis=0)
+
+    # Same structure as app.display_categorized_students: Category, Count and Pool ID, with
+    # pools in pool_ids order and categories in category order within each pool
+    def candidate_counts(self, pool_ids):
+        pool_ids = tuple(pool_ids)
+        return self._memoized(("candidate_counts", pool_ids), self._candidate_counts, pool_ids)
+
+    def _candidate_counts(self, pool_ids):
+        pool_ids = list(pool_ids)
+        counts = self.candidates[self.candidates.index.get_level_values("Pool ID").isin(pool_ids)]
+        counts = counts[counts > 0].reset_index()
+        pool_order = pd.Categorical(counts["Pool ID"], categories=list(dict.fromkeys(pool_ids)), ordered=True)
+        counts = counts.iloc[np.argsort(pool_order.codes, kind="stable")]
+        return counts[["Category", "Count", "Pool ID"]].reset_index(drop=True)
+
+# Sessions per partial build when build_cube() is given a stream rather than a list
+BUILD_BATCH_SIZE = 20000
+
+# Build a cube from db_logic session tuples (id, pool_id, performance, is_completed,
+# details) and candidates categorized by app.categorize_students. Each session's branch
+# comes from its first candidate row, as in get_branch_performance_data.
+# sessions may also be any iterable, such as a database stream: it is then read
+# BUILD_BATCH_SIZE sessions at a time and the partial cells are merged, so only one batch
+# is held. Merged cells are ordered as a list sorted by session id would build them.
+@instrumented()
+def build_cube(sessions, students_df, version=None):
+    session_categories = (
+        students_df.drop_duplicates('Session ID').set_index('Session ID')['Category'].astype(object)
+    )
+    if isinstance(sessions, (list, tuple)):
+        cells = _build_cells(sessions, session_categories)
+    else:
+        sessions = iter(sessions)
+        parts = []
+        while batch := list(itertools.islice(sessions, BUILD_BATCH_SIZE)):
+            parts.append(_build_cells(batch, session_categories))
+        cells = _merge_cells(parts)
+
+    candidates = students_df.groupby(["Pool ID", "Category"], observed=True).size().rename("Count")
+    return Cube(cells, candidates, version)
+
+def _build_cells(sessions, session_categories):
+    if len(sessions) == 0:
+        return _empty_cells()
+    session_ids = np.asarray([session[0] for session in sessions], dtype=np.int64)
+    pool_ids = np.asarray([session[1] for session in sessions], dtype=np.int64)
+    scores = np.asarray([session[2] for session in sessions], dtype=float)
+    completed = np.asarray([bool(session[3]) for session in sessions], dtype=bool)
+    categories = pd.Series(session_ids).map(session_categories).fillna(UNMATCHED).to_numpy(dtype=object)
+
+    # One row per sub-category score, pointing back at its session. Snapshot sessions
+    # carry no details, so a snapshot cube has session-level scores only.
+    sub_index, sub_names, sub_scores = [], [], []
+    for index, session in enumerate(sessions):
+        details = json.loads(session[4]) if isinstance(session[4], str) else session[4]
+        for sub_category, sub_data in (details or {}).items():
+            if isinstance(sub_data, dict) and 'score' in sub_data:
+                sub_index.append(index)
+                sub_names.append(sub_category)
+                sub_scores.append(sub_data['score'])
+    sub_index = np.asarray(sub_index, dtype=np.int64)
+
+    rows = pd.DataFrame({
+        "Pool ID": np.concatenate([pool_ids, pool_ids[sub_index]]),
+        "Category": np.concatenate([categories, categories[sub_index]]),
+        "Sub-Category": np.concatenate([np.full(len(sessions), OVERALL, dtype=object), np.asarray(sub_names, dtype=object)]),
+        "Completed": np.concatenate([completed, completed[sub_index]]),
+        "Score": np.concatenate([scores, np.asarray(sub_scores, dtype=float)]),
+        "Session ID": np.concatenate([session_ids, session_ids[sub_index]]),
+    })
+    rows["Failed"] = rows["Score"] < FAIL_THRESHOLD
+    rows["Bucket"] = np.clip(
+        np.searchsorted(bucket_edges(), rows["Score"].to_numpy(), side="right") - 1, 0, HISTOGRAM_BUCKETS - 1
+    )
+
+    cells = rows.groupby(DIMENSIONS, sort=False).agg(**{
+        "Count": ("Score", "size"),
+        "Scored": ("Score", "count"),
+        "Score Sum": ("Score", "sum"),
+        "Failed": ("Failed", "sum"),
+        "First Session": ("Session ID", "min"),
+    })
+    histogram = (
+        rows[rows["Score"].notna()].groupby(DIMENSIONS + ["Bucket"], sort=False).size()
+        .unstack("Bucket", fill_value=0)
+        .reindex(index=cells.index, columns=range(HISTOGRAM_BUCKETS), fill_value=0)
+        .astype("int64")  # float when no session has a score
+    )
+    histogram.columns = BUCKET_COLUMNS
+    return cells.join(histogram)
+
+# Cells of several partial builds combined: measures add up, except First Session. Session
+# scores come before sub-category scores, each in order of their first session; sub-category
+# cells sharing a first session keep their order, since one session never spans two builds.
+def _merge_cells(parts):
+    if not parts:
+        return _empty_cells()
+    aggregations = {column: "sum" for column in MEASURES}
+    aggregations["First Session"] = "min"
+    cells = pd.concat(parts).groupby(level=DIMENSIONS, sort=False).agg(aggregations)
+    order = np.lexsort((
+        cells["First Session"].to_numpy(),
+        cells.index.get_level_values("Sub-Category") != OVERALL,
+    ))
+    # lexsort is stable, so ties keep the order of the partial builds
+    return cells.iloc[order]
+
+# Per-(pool, year) cubes shared by every session in the process. Pools whose data version
+# changed are rebuilt together in one pass from load(pool_ids) -> (sessions, candidates);
+# the last few combinations of pools handed out are kept assembled, so a rerun on
+# unchanged data returns the same Cube (and its memoized slices) without any work.
+# Loads and builds run outside the cache's lock: only requests rebuilding the same pool
+# wait for each other.
+class CubeCache:
+    def __init__(self, max_assembled=32):
+        self._cubes = {}  # (pool_id, year) -> Cube, its version being the pool's token
+        self._assembled = OrderedDict()  # (pool_ids, year, versions) -> Cube
+        self._max_assembled = max_assembled
+        self._building = {}  # (pool_id, year) -> lock held while that pool's cube is rebuilt
+        self._lock = threading.Lock()  # guards the dicts only, never held across a load
+
+    # {pool_id: cube} for the pools whose cube is built for the given version
+    def _current(self, pool_ids, year, versions):
+        with self._lock:
+            return {
+                pool_id: self._cubes[(pool_id, year)] for pool_id, version in zip(pool_ids, versions)
+                if (pool_id, year) in self._cubes and self._cubes[(pool_id, year)].version == version
+            }
+
+    def get(self, pool_ids, year, versions, load):
+        pool_ids, versions = tuple(pool_ids), tuple(versions)
+        key = (pool_ids, year, versions)
+        with self._lock:
+            if key in self._assembled:
+                self._assembled.move_to_end(key)
+                return self._assembled[key]
+
+        cubes = self._current(pool_ids, year, versions)
+        stale = [pool_id for pool_id in pool_ids if pool_id not in cubes]
+        if stale:
+            # Only requests for the same pools wait for each other. Locks are taken in a
+            # fixed order, and the pools are re-checked once they are held, since another
+            # request may have just rebuilt some of them.
+            stale_versions = dict(zip(pool_ids, versions))
+            with self._lock:
+                locks = [self._building.setdefault((pool_id, year), threading.Lock()) for pool_id in sorted(set(stale))]
+            for lock in locks:
+                lock.acquire()
+            try:
+                cubes.update(self._current(stale, year, [stale_versions[pool_id] for pool_id in stale]))
+                stale = [pool_id for pool_id in stale if pool_id not in cubes]
+                if stale:
+                    sessions, students_df = load(stale)
+                    built = build_cube(sessions, students_df).split(stale)
+                    with self._lock:
+                        for pool_id, cube in built.items():
+                            cube.version = stale_versions[pool_id]
+                            self._cubes[(pool_id, year)] = cube
+                    cubes.update(built)
+            finally:
+                for lock in reversed(locks):
+                    lock.release()
+
+        cube = cubes[pool_ids[0]] if len(pool_ids) == 1 else Cube.concat([cubes[pool_id] for pool_id in pool_ids], version=versions)
+        with self._lock:
+            cube = self._assembled.setdefault(key, cube)
+            self._assembled.move_to_end(key)
+            if len(self._assembled) > self._max_assembled:
+                self._assembled.popitem(last=False)
+        return cube
+
+    # Per-pool cubes currently held, for memory reporting (assembled cubes are built from
+    # the same cells and not counted again)
+    def cubes(self):
+        with self._lock:
+            return list(self._cubes.values())
+
+    def clear(self):
+        with self._lock:
+            self._cubes.clear()
+            self._assembled.clear()
@@ -0,0 +1,230 @@
+#data_cache.py
+
+# Process-wide stale-while-revalidate cache for the dashboard getters. Each dataset has
+# its own TTL; an expired entry is still served immediately while a background thread
+# reloads it, so only the very first load of a key (or one after invalidate()) blocks.
+# Cached values are shared between sessions and must not be mutated by callers.
+# Loads go through the cross-process cache in shared_cache.py when one is configured, so
+# replicas reuse each other's results instead of all querying Postgres.
+
+import functools
+import itertools
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from instrumentation import record_cache
+from shared_cache import discard, get_backend, get_fresh, get_or_load, publish
+
+logger = logging.getLogger(__name__)
+
+# name -> SWRCache, so pages and the sidebar can invalidate or inspect datasets by name
+CACHES = {}
+
+# Process-wide sequence for entry versions, so a reloaded or re-created entry never
+# reuses a version an earlier value had
+_versions = itertools.count(1)
+
+class _Entry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.value = None
+        self.fetched_at = None  # wall-clock time of the last successful load
+        self.expires_at = None  # time.monotonic() deadline, None for no expiry
+        self.refreshing = False
+        self.version = None  # changes on every successful load
+
+    # fetched_at is when the value was loaded, possibly earlier by another process; the
+    # entry expires ttl seconds after that rather than after it reached this process
+    def store(self, value, ttl, fetched_at=None):
+        self.value = value
+        self.version = next(_versions)
+        self.loaded = True
+        now = datetime.now(timezone.utc)
+        self.fetched_at = fetched_at or now
+        age = max(0.0, (now - self.fetched_at).total_seconds())
+        self.expires_at = None if ttl is None else time.monotonic() + ttl - age
+
+    def expired(self):
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+class SWRCache:
+    def __init__(self, name, loader, ttl=None, ttl_for=None):
+        self.name = name
+        self.loader = loader
+        self.ttl = ttl
+        self.ttl_for = ttl_for
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    # TTL of one key: ttl_for(ttl, *args) can override the dataset's TTL per key, e.g. None
+    # (never expire) for data that can no longer change
+    def ttl_of(self, args):
+        return self.ttl if self.ttl_for is None else self.ttl_for(self.ttl, *args)
+
+    def _entry(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = _Entry()
+            return self._entries[key]
+
+    # (value, fetched_at) from the shared cache if configured, otherwise from the loader
+    def _load(self, args):
+        backend = get_backend()
+        if backend is None:
+            return self.loader(*args), None
+        value, stored_at, outcome = get_or_load(backend, self.name, args, self.ttl_of(args), lambda: self.loader(*args))
+        record_cache(f"shared:{self.name}", outcome)
+        return value, datetime.fromtimestamp(stored_at, timezone.utc)
+
+    def get(self, *args):
+        entry = self._entry(args)
+        with entry.lock:
+            if not entry.loaded:
+                # Concurrent first requests for the same key wait for one load
+                record_cache(self.name, "miss")
+                value, fetched_at = self._load(args)
+                entry.store(value, self.ttl_of(args), fetched_at)
+                return entry.value
+            if entry.expired():
+                record_cache(self.name, "stale")
+                if not entry.refreshing:
+                    entry.refreshing = True
+                    threading.Thread(
+                        target=self._refresh, args=(args, entry), name=f"refresh-{self.name}", daemon=True
+                    ).start()
+            else:
+                record_cache(self.name, "hit")
+            return entry.value
+
+    # Values for several argument tuples at once. Entries that are not loaded yet are
+    # fetched together with load_many(missing) -> {args: value}, e.g. one query for many
+    # pools; loaded ones behave as in get(), including background refreshes. As in get(),
+    # concurrent requests wait for one load of the keys they share: the entry locks of the
+    # missing keys are held during the load, taken in a fixed order so that requests for
+    # overlapping keys cannot deadlock.
+    def get_many(self, keys, load_many):
+        keys = list(dict.fromkeys(keys))
+        locked = sorted(
+            ((key, self._entry(key)) for key in keys if not self._entry(key).loaded),
+            key=lambda item: repr(item[0])
+        )
+        values = {}
+        for _, entry in locked:
+            entry.lock.acquire()
+        try:
+            # Keys loaded by another request while we waited are served as in get()
+            missing = [(key, entry) for key, entry in locked if not entry.loaded]
+            if missing:
+                for key, _ in missing:
+                    record_cache(self.name, "miss")
+                loaded = self._load_many([key for key, _ in missing], load_many)
+                for key, entry in missing:
+                    entry.store(loaded[key][0], self.ttl_of(key), loaded[key][1])
+                    values[key] = entry.value
+        finally:
+            for _, entry in reversed(locked):
+                entry.lock.release()
+        return {key: values[key] if key in values else self.get(*key) for key in keys}
+
+    # {args: (value, fetched_at)}. Keys still fresh in the shared cache are taken from it;
+    # the rest are bulk-loaded and published. Unlike _load() this does not coalesce
+    # concurrent bulk loads across processes.
+    def _load_many(self, keys, load_many):
+        backend = get_backend()
+        loaded = {}
+        if backend is not None:
+            for key in keys:
+                item = get_fresh(backend, self.name, key, self.ttl_of(key))
+                if item is not None:
+                    record_cache(f"shared:{self.name}", "hit")
+                    loaded[key] = (item[0], datetime.fromtimestamp(item[1], timezone.utc))
+
+        remaining = [key for key in keys if key not in loaded]
+        if remaining:
+            fetched_at = datetime.now(timezone.utc)
+            values = load_many(remaining)
+            for key in remaining:
+                loaded[key] = (values[key], fetched_at)
+                if backend is not None:
+                    record_cache(f"shared:{self.name}", "miss")
+                    publish(backend, self.name, key, values[key], fetched_at.timestamp())
+        return loaded
+
+    def _refresh(self, args, entry):
+        try:
+            value, fetched_at = self._load(args)
+        except Exception:
+            # Keep serving the stale value; the next access past the TTL retries
+            logger.exception("Background refresh of %s%r failed", self.name, args)
+            with entry.lock:
+                entry.refreshing = False
+            return
+        with self._lock:
+            current = self._entries.get(args) is entry
+        with entry.lock:
+            # An entry dropped by invalidate() while we were loading stays dropped
+            if current:
+                entry.store(value, self.ttl_of(args), fetched_at)
+            entry.refreshing = False
+
+    # Drops entries here and in the shared cache, so the next load queries the database
+    def invalidate(self, *args):
+        with self._lock:
+            if args:
+                self._entries.pop(args, None)
+            else:
+                self._entries.clear()
+        backend = get_backend()
+        if backend is not None:
+            discard(backend, self.name, args or None)
+
+    # Version of the value currently cached for these arguments (None if not loaded)
+    def version(self, *args):
+        with self._lock:
+            entry = self._entries.get(args)
+        return None if entry is None else entry.version
+
+    # Values currently loaded, for memory reporting
+    def values(self):
+        with self._lock:
+            entries = list(self._entries.values())
+        return [entry.value for entry in entries if entry.loaded]
+
+    # Load time of the value currently cached for these arguments (None if not loaded)
+    def as_of(self, *args):
+        with self._lock:
+            entry = self._entries.get(args)
+        return None if entry is None else entry.fetched_at
+
+def dataset_ttl(name, default):
+    value = os.getenv(f"CACHE_TTL_{name.upper()}")
+    if value is None:
+        return default
+    return float(value) if float(value) > 0 else None
+
+# Decorator: @swr_cache("interview_data", ttl=600). TTLs can be overridden per dataset with
+# CACHE_TTL_<NAME> (seconds, 0 for no expiry), and per key with ttl_for (see
+# SWRCache.ttl_of). Arguments must be hashable.
+def swr_cache(name, ttl=None, ttl_for=None):
+    def decorator(loader):
+        cache = SWRCache(name, loader, dataset_ttl(name, ttl), ttl_for)
+        CACHES[name] = cache
+
+        @functools.wraps(loader)
+        def wrapper(*args):
+            return cache.get(*args)
+
+        wrapper.cache = cache
+        wrapper.invalidate = cache.invalidate
+        wrapper.as_of = cache.as_of
+        wrapper.version = cache.version
+        return wrapper
+    return decorator
+
+def invalidate_all():
+    for cache in CACHES.values():
+        cache.invalidate()
@@ -0,0 +1,61 @@
+#data_loader.py
+
+# Concurrent loading of the datasets a page needs. A page declares its datasets up front,
+# each as a getter plus the names of the datasets its arguments come from, and
+# load_datasets() runs every getter as soon as its inputs are ready on a shared thread
+# pool (each worker borrows its own pooled connection), so a cold page load costs about
+# the slowest dependency chain instead of the sum of all queries.
+#
+#   data = load_datasets({
+#       "interview_data": get_interview_data,
+#       "counts": get_student_counts,
+#       "performance": (lambda rows: get_performance_data([row[0] for row in rows]), ["interview_data"]),
+#   })
+#
+# Getters run outside the Streamlit script thread, so they must not call st.* functions.
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+DATA_LOADER_WORKERS = int(os.getenv("DATA_LOADER_WORKERS", 4))
+
+_executor = ThreadPoolExecutor(max_workers=DATA_LOADER_WORKERS, thread_name_prefix="data-loader")
+
+def _normalize(spec):
+    if callable(spec):
+        return spec, ()
+    getter, depends_on = spec
+    return getter, tuple(depends_on)
+
+def load_datasets(specs):
+    specs = {name: _normalize(spec) for name, spec in specs.items()}
+    for name, (_, depends_on) in specs.items():
+        missing = [dependency for dependency in depends_on if dependency not in specs]
+        if missing:
+            raise ValueError(f"Dataset {name!r} depends on undeclared datasets: {missing}")
+
+    results = {}
+    running = {}  # future -> dataset name
+    pending = dict(specs)
+
+    try:
+        while pending or running:
+            # Start everything whose inputs are available
+            for name, (getter, depends_on) in list(pending.items()):
+                if all(dependency in results for dependency in depends_on):
+                    future = _executor.submit(getter, *[results[dependency] for dependency in depends_on])
+                    running[future] = name
+                    del pending[name]
+
+            if not running:
+                raise ValueError(f"Dataset dependencies form a cycle: {sorted(pending)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                # result() re-raises the getter's exception in the page's thread
+                results[running.pop(future)] = future.result()
+    finally:
+        for future in running:
+            future.cancel()
+
+    return results
@@ -0,0 +1,184 @@
+#instrumentation.py
+
+# Hot-path instrumentation for the dashboard: database queries (wall time, rows, approximate
+# payload bytes), processing functions, chart construction, cache hits/misses and lazy
+# page imports. Events are kept in a bounded in-memory log plus running per-name totals
+# that the Diagnostics page reads, and can be appended as JSON lines to DIAGNOSTICS_LOG
+# for offline analysis.
+# Set DIAGNOSTICS_ENABLED=false to turn recording off.
+
+import functools
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import psycopg2.extensions
+
+DIAGNOSTICS_ENABLED = os.getenv("DIAGNOSTICS_ENABLED", "true").lower() not in ("0", "false", "no")
+DIAGNOSTICS_LOG = os.getenv("DIAGNOSTICS_LOG")
+MAX_EVENTS = int(os.getenv("DIAGNOSTICS_MAX_EVENTS", 5000))
+
+# Rows sampled per fetch to estimate the payload size of a result set
+PAYLOAD_SAMPLE_ROWS = 50
+
+_lock = threading.Lock()
+_events = deque(maxlen=MAX_EVENTS)
+_totals = {}  # (kind, name) -> running totals
+
+def _record(event):
+    if not DIAGNOSTICS_ENABLED:
+        return
+    event["at"] = datetime.now(timezone.utc).isoformat()
+    with _lock:
+        _events.append(event)
+        totals = _totals.setdefault((event["kind"], event["name"]), {
+            "kind": event["kind"], "name": event["name"], "count": 0,
+            "seconds": 0.0, "max_seconds": 0.0, "rows": 0, "bytes": 0, "outcomes": {},
+        })
+        totals["count"] += 1
+        totals["seconds"] += event.get("seconds", 0.0)
+        totals["max_seconds"] = max(totals["max_seconds"], event.get("seconds", 0.0))
+        totals["rows"] += event.get("rows", 0)
+        totals["bytes"] += event.get("bytes", 0)
+        if "outcome" in event:
+            totals["outcomes"][event["outcome"]] = totals["outcomes"].get(event["outcome"], 0) + 1
+        if DIAGNOSTICS_LOG:
+            with open(DIAGNOSTICS_LOG, "a") as f:
+                f.write(json.dumps(event, default=str) + "\n")
+
+def record_timing(kind, name, seconds, **fields):
+    _record({"kind": kind, "name": name, "seconds": seconds, **fields})
+
+def record_cache(name, outcome):
+    # outcome: "hit", "miss" (blocking load) or "stale" (served while refreshing)
+    _record({"kind": "cache", "name": name, "outcome": outcome})
+
+@contextmanager
+def timed(name, kind="processing"):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(kind, name, time.perf_counter() - start)
+
+# Decorator form of timed(), named after the wrapped function unless given a name
+def instrumented(name=None, kind="processing"):
+    def decorator(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(label, kind):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# importlib.import_module() that records the first, uncached import of a module (including
+# everything it pulls in) as an "import" event
+def import_timed(module_name):
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+    with timed(module_name, kind="import"):
+        return importlib.import_module(module_name)
+
+def _caller_name():
+    # Nearest public function that issued the query, e.g. "fetch_interview_data" rather
+    # than this module, psycopg2 or a private helper such as _iter_named_cursor
+    frame = sys._getframe(2)
+    while frame is not None and (
+        frame.f_code.co_filename == __file__
+        or "psycopg2" in frame.f_code.co_filename
+        or frame.f_code.co_name.startswith("_")
+    ):
+        frame = frame.f_back
+    if frame is None:
+        return "query"
+    return getattr(frame.f_code, "co_qualname", frame.f_code.co_name)
+
+def _approx_size(rows):
+    if not rows:
+        return 0
+    sample = rows[:PAYLOAD_SAMPLE_ROWS]
+    sampled = sum(len(str(value)) for row in sample for value in row)
+    return sampled * len(rows) // len(sample)
+
+# Cursor that reports each statement as a "query" event when it is closed: execute time
+# plus fetch time (which is where server-side cursors do their transfer), rows fetched and
+# an estimate of the payload size extrapolated from a sample of each fetched batch
+class InstrumentedCursor(psycopg2.extensions.cursor):
+    def execute(self, query, vars=None):
+        self._flush()
+        self._query_name = _caller_name()
+        self._query_seconds = 0.0
+        self._query_rows = 0
+        self._query_bytes = 0
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            self._query_seconds += time.perf_counter() - start
+
+    def _fetched(self, rows, start):
+        if getattr(self, "_query_name", None) is not None:
+            self._query_seconds += time.perf_counter() - start
+            self._query_rows += len(rows)
+            self._query_bytes += _approx_size(rows)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        return self._fetched(super().fetchall(), start)
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(size) if size is not None else super().fetchmany()
+        return self._fetched(rows, start)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched([row] if row is not None else [], start)
+        return row
+
+    # COPY transfers are recorded as soon as they finish, with the rows copied and the exact
+    # number of bytes written to file
+    def copy_expert(self, sql, file, size=8192):
+        self._flush()
+        name = _caller_name()
+        position = file.tell() if file.seekable() else 0
+        start = time.perf_counter()
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            written = file.tell() - position if file.seekable() else 0
+            record_timing("query", name, time.perf_counter() - start, rows=max(self.rowcount, 0), bytes=written)
+
+    def _flush(self):
+        if getattr(self, "_query_name", None) is not None:
+            record_timing("query", self._query_name, self._query_seconds,
+                          rows=self._query_rows, bytes=self._query_bytes)
+            self._query_name = None
+
+    def close(self):
+        self._flush()
+        super().close()
+
+def snapshot():
+    with _lock:
+        return list(_events), [dict(totals, outcomes=dict(totals["outcomes"])) for totals in _totals.values()]
+
+def export_events():
+    events, _ = snapshot()
+    return "".join(json.dumps(event, default=str) + "\n" for event in events)
+
+def reset():
+    with _lock:
+        _events.clear()
+        _totals.clear()
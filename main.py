@@ -1,21 +1,45 @@
+import os
 import streamlit as st
-from page.home import home_page
-from page.interviews import interviews_page
-from page.categorical_analysis import categorical_analysis_page
-from page.test_analysis import test_analysis_page
+from datetime import date
+from instrumentation import import_timed
+
+# Load the shared datasets, sessions and cube in the background when the process first runs
+# the script, rather than on the first visit to each page (see warmup.py)
+WARMUP_ON_BOOT = os.getenv("WARMUP_ON_BOOT", "false").lower() not in ("0", "false", "no")
+
+# Page name -> (module, render function). Modules are imported on first navigation, so
+# starting the server and rendering the first page don't pay for every page's imports.
+PAGES = {
+    "Home": ("page.home", "home_page"),
+    "Interviews": ("page.interviews", "interviews_page"),
+    "Overall Analysis": ("page.categorical_analysis", "categorical_analysis_page"),
+    "Test Analysis": ("page.test_analysis", "test_analysis_page"),
+    "Diagnostics": ("page.diagnostics", "diagnostics_page"),
+}
+
+# Runs once per server process
+@st.cache_resource(show_spinner=False)
+def start_warm_up():
+    return import_timed("warmup").start_warm_up()
 
 def main():
+    if WARMUP_ON_BOOT:
+        start_warm_up()
+
     st.sidebar.title("Navigation")
-    page = st.sidebar.radio("Select a page", ["Home", "Interviews", "Overall Analysis", "Test Analysis"])
-
-    if page == "Home":
-        home_page()
-    elif page == "Interviews":
-        interviews_page()
-    elif page == "Overall Analysis":
-        categorical_analysis_page()
-    elif page == "Test Analysis":
-        test_analysis_page()
+    page = st.sidebar.radio("Select a page", list(PAGES))
+
+    # Pages list the pools interviewed in this range (read with app.selected_date_range());
+    # the default is the current year, as db_logic.current_year_range() without importing it
+    today = date.today()
+    st.sidebar.date_input("Interview dates", value=(date(today.year, 1, 1), date(today.year, 12, 31)), key="date_range")
+
+    # Cached data is refreshed in the background once its TTL passes; this forces a reload now
+    if st.sidebar.button("Refresh data"):
+        import_timed("app").invalidate_dashboard_data()
+
+    module_name, function_name = PAGES[page]
+    getattr(import_timed(module_name), function_name)()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,91 @@
+#page/diagnostics.py
+
+import streamlit as st
+import pandas as pd
+
+from instrumentation import DIAGNOSTICS_ENABLED, DIAGNOSTICS_LOG, snapshot, export_events, reset, import_timed
+
+def timing_table(totals, kind):
+    rows = [
+        {
+            'Name': entry['name'],
+            'Calls': entry['count'],
+            'Total (s)': round(entry['seconds'], 3),
+            'Average (ms)': round(entry['seconds'] / entry['count'] * 1000, 1),
+            'Max (ms)': round(entry['max_seconds'] * 1000, 1),
+            'Rows': entry['rows'],
+            'Approx. KiB': round(entry['bytes'] / 1024, 1),
+        }
+        for entry in totals if entry['kind'] == kind
+    ]
+    df = pd.DataFrame(rows, columns=['Name', 'Calls', 'Total (s)', 'Average (ms)', 'Max (ms)', 'Rows', 'Approx. KiB'])
+    if kind != 'query':
+        df = df.drop(columns=['Rows', 'Approx. KiB'])
+    return df.sort_values('Total (s)', ascending=False, ignore_index=True)
+
+def cache_table(totals):
+    rows = []
+    for entry in totals:
+        if entry['kind'] != 'cache':
+            continue
+        outcomes = entry['outcomes']
+        rows.append({
+            'Cache': entry['name'],
+            'Requests': entry['count'],
+            'Hits': outcomes.get('hit', 0),
+            'Stale': outcomes.get('stale', 0),
+            'Deltas': outcomes.get('delta', 0),
+            'Coalesced': outcomes.get('coalesced', 0),
+            'Misses': outcomes.get('miss', 0),
+            # Stale reads and results waited for from another process need no query either
+            'Hit Rate (%)': round(
+                (outcomes.get('hit', 0) + outcomes.get('stale', 0) + outcomes.get('coalesced', 0)) / entry['count'] * 100, 1
+            ),
+        })
+    df = pd.DataFrame(rows, columns=['Cache', 'Requests', 'Hits', 'Stale', 'Deltas', 'Coalesced', 'Misses', 'Hit Rate (%)'])
+    return df.sort_values('Cache', ignore_index=True)
+
+def diagnostics_page():
+    st.title("Skill-2030 Dashboard - Diagnostics")
+
+    if not DIAGNOSTICS_ENABLED:
+        st.write("Instrumentation is disabled (DIAGNOSTICS_ENABLED=false).")
+        return
+
+    events, totals = snapshot()
+    st.caption(
+        f"{len(events)} recent events since the server started or was last reset"
+        + (f"; also logged to {DIAGNOSTICS_LOG}" if DIAGNOSTICS_LOG else "")
+    )
+
+    st.subheader("Database Queries")
+    st.dataframe(timing_table(totals, 'query'), use_container_width=True)
+
+    st.subheader("Cache Hit Rates")
+    st.dataframe(cache_table(totals), use_container_width=True)
+
+    st.subheader("Processing")
+    st.dataframe(timing_table(totals, 'processing'), use_container_width=True)
+
+    st.subheader("Charts")
+    st.dataframe(timing_table(totals, 'chart'), use_container_width=True)
+
+    st.subheader("Memory")
+    st.caption("Approximate size of each cached dataset in this process; savings are estimated from sizes measured at compaction (COMPACT_STORAGE)")
+    memory_df = pd.DataFrame(
+        import_timed("app").memory_report(),
+        columns=['Dataset', 'Entries', 'Size (MiB)', 'Uncompacted (MiB)', 'Saved (%)']
+    )
+    st.dataframe(memory_df.round(2), use_container_width=True)
+
+    st.subheader("Imports")
+    st.caption("First import of each module in this process, including its dependencies")
+    st.dataframe(timing_table(totals, 'import'), use_container_width=True)
+
+    st.subheader("Recent Events")
+    st.dataframe(pd.DataFrame(events[::-1][:200]), use_container_width=True)
+
+    st.download_button("Download events (JSON lines)", export_events(), file_name="diagnostics.jsonl", mime="application/json")
+    if st.button("Reset diagnostics"):
+        reset()
+        st.rerun()
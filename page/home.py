@@ -2,7 +2,7 @@
 
 import streamlit as st
 import pandas as pd
-from app import get_student_counts, render_pie_chart
+from app import get_student_counts, render_pie_chart, render_data_as_of
 
 def home_page():
     st.title("Skill-2030 Dashboard - Home")
@@ -10,3 +10,4 @@ def home_page():
     # Fetch and render student count data categorized by batch
     batch_counts = get_student_counts()
     render_pie_chart(batch_counts)
+    render_data_as_of("student_counts")
@@ -4,29 +4,12 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 
-from app import render_performance_metrics, get_interview_data, get_students, categorize_students, display_categorized_students, plot_candidate_distribution, get_interview_sessions, get_performance_data
-
-def interviews_page():
-    st.title("Skill-2030 Dashboard - Interviews")
-
-    # Fetch the interview data
-    interview_data = get_interview_data()
-    columns = ["ID", "Name", "Description", "Created On", "Candidates", "Start Time", "End Time"]
-    interview_df = pd.DataFrame(interview_data, columns=columns)
-    interview_df['Created On'] = pd.to_datetime(interview_df['Created On']).dt.date
-    interview_df['Start Time'] = pd.to_datetime(interview_df['Start Time']).dt.tz_localize(None).dt.strftime('%Y-%m-%d %H:%M:%S')
-    interview_df['End Time'] = pd.to_datetime(interview_df['End Time']).dt.tz_localize(None).dt.strftime('%Y-%m-%d %H:%M:%S')
-
-    st.dataframe(interview_df)
-
-    # Fetch student data and categorize
-    students_df = get_students()
-    categorized_students_df = categorize_students(students_df)
-    all_categorized_students_df = display_categorized_students(categorized_students_df, interview_df)
-
-    # Plot candidate distribution
-    plot_candidate_distribution(interview_df, all_categorized_students_df)
+from data_loader import load_datasets
+from instrumentation import instrumented
+from app import render_performance_metrics, get_interview_data, cube_datasets, plot_candidate_distribution, render_data_as_of, cube_sources, data_version, cached_figures, selected_date_range
 
+@instrumented("Branch Distribution for Each Assignment Pool", kind="chart")
+def build_branch_distribution_figure(all_categorized_students_df):
     # Plot the categorized student distribution with Pool ID as separate bars
     fig_students = px.bar(
         all_categorized_students_df,
@@ -39,7 +22,7 @@ def interviews_page():
         barmode='group',
         text='Count'  # Add text labels to bars
     )
-    
+
     fig_students.update_traces(
         texttemplate='%{text}',  # Show the count value
         textposition='inside',   # Position the text inside the bars
@@ -52,13 +35,47 @@ def interviews_page():
         xaxis_tickangle=-45  # Rotate x-axis labels if needed
     )
 
+    return fig_students
+
+def interviews_page():
+    st.title("Skill-2030 Dashboard - Interviews")
+
+    # Taken before loading, so a concurrent refresh can't pair new data with an old token
+    date_range = selected_date_range()
+    interview_version = data_version("interview_data", *date_range)
+
+    # Fetch the interview pools, then (concurrently) the listed pools' sessions and
+    # candidates, from which their cube is built
+    data = load_datasets({
+        "interview_data": lambda: get_interview_data(*date_range),
+        **cube_datasets(lambda interview_data: [row[0] for row in interview_data], ["interview_data"]),
+    })
+    interview_data = data["interview_data"]
+    columns = ["ID", "Name", "Description", "Created On", "Candidates", "Start Time", "End Time"]
+    interview_df = pd.DataFrame(interview_data, columns=columns)
+    interview_df['Created On'] = pd.to_datetime(interview_df['Created On']).dt.date
+    interview_df['Start Time'] = pd.to_datetime(interview_df['Start Time']).dt.tz_localize(None).dt.strftime('%Y-%m-%d %H:%M:%S')
+    interview_df['End Time'] = pd.to_datetime(interview_df['End Time']).dt.tz_localize(None).dt.strftime('%Y-%m-%d %H:%M:%S')
+
+    st.dataframe(interview_df)
+
+    # Candidate counts per pool and category, sliced from the cube
+    cube = data["cube"]
+    pool_ids = interview_df['ID'].tolist()
+    counts_version = (interview_version, cube.version)
+    all_categorized_students_df = cube.candidate_counts(pool_ids)
+
+    # Plot candidate distribution
+    plot_candidate_distribution(interview_df, all_categorized_students_df, version=counts_version)
+
+    fig_students = cached_figures(
+        "branch_distribution", counts_version, lambda: build_branch_distribution_figure(all_categorized_students_df)
+    )
     st.plotly_chart(fig_students, use_container_width=True)
 
     # Prepare pool names mapping
     pool_names = {row['ID']: row['Name'] for _, row in interview_df.iterrows()}
 
     # Display performance metrics
-    pool_ids = interview_df['ID'].tolist()
-    interview_sessions = get_interview_sessions(pool_ids)
-    performance_data = get_performance_data(interview_sessions)
-    render_performance_metrics(performance_data, pool_names)
+    render_performance_metrics(cube.pool_performance(pool_ids), pool_names, version=counts_version)
+    render_data_as_of(("interview_data", *date_range), *cube_sources(pool_ids))
@@ -1,66 +1,159 @@
+import os
 import streamlit as st
+import numpy as np
 import pandas as pd
-import json
 import plotly.express as px
 import plotly.graph_objects as go
-from db_logic import connect_to_db, fetch_interview_sessions, fetch_interview_data, fetch_student_count_by_batch
-from app import render_performance_metrics, get_interview_data, get_interview_sessions, get_student_counts, get_students, get_performance_data, render_pie_chart, categorize_students
+from app import get_interview_data, get_interview_sessions, cube_datasets, cube_sources, render_data_as_of, selected_date_range
+from data_loader import load_datasets
+from instrumentation import instrumented, timed
+from cube import OVERALL, QUANTILES, histogram_quantiles
 
+# Reference implementation of cube.Cube.branch_performance that walks every session in
+# Python; the pages read the cube, and the benchmarks compare the two
+@instrumented()
 def get_branch_performance_data(interview_sessions, categorized_students_df):
-    # Prepare data structure to hold branch performance data
-    branch_scores = {}
-    
-    # Iterate through each session to process the data
-    for session in interview_sessions:
-        session_id, pool_id, performance, is_completed, details = session
-        
-        if isinstance(details, str):
-            details = json.loads(details)
-        
-        # Get category from categorized students dataframe
-        student_category = categorized_students_df[categorized_students_df['Session ID'] == session_id]['Category'].values
-        
-        if not student_category:
-            continue
-        
-        student_category = student_category[0]
-        
-        if student_category not in branch_scores:
-            branch_scores[student_category] = {
-                'scores': [],
-                'num_failed': 0,
-                'not_completed': 0
-            }
-        
-        branch_scores[student_category]['scores'].append(performance)
-        
-        if performance < 70:
-            branch_scores[student_category]['num_failed'] += 1
-        
-        if not is_completed:
-            branch_scores[student_category]['not_completed'] += 1
-
-    # Aggregate the data
-    performance_data = []
-    for category, data in branch_scores.items():
-        avg_score = sum(data['scores']) / len(data['scores']) if data['scores'] else None
-        avg_score = round(avg_score, 1)  # Round to nearest decimal place
-        
-        performance_data.append({
+    if not interview_sessions:
+        return []
+
+    sessions_df = pd.DataFrame({
+        'Session ID': [session[0] for session in interview_sessions],
+        'Performance': [session[2] for session in interview_sessions],
+        'Not Completed': [not session[3] for session in interview_sessions],
+    })
+
+    # Attach each session's branch with one hashed lookup on Session ID instead of scanning
+    # the candidates for every session; the first candidate per session wins, as before
+    session_categories = (
+        categorized_students_df.drop_duplicates('Session ID')
+        .set_index('Session ID')['Category']
+    )
+    sessions_df['Category'] = sessions_df['Session ID'].map(session_categories)
+    sessions_df = sessions_df.dropna(subset=['Category'])
+    sessions_df['Failed'] = sessions_df['Performance'] < 70
+
+    # Aggregate per branch, keeping branches in order of first appearance
+    branch_agg = sessions_df.groupby('Category', sort=False, observed=True).agg(
+        average=('Performance', 'mean'),
+        failed=('Failed', 'sum'),
+        not_completed=('Not Completed', 'sum'),
+    )
+
+    return [
+        {
             'Category': category,
-            'Average Score': avg_score,
-            'Number of Students Failed': data['num_failed'],
-            'Number of Students Not Completed': data['not_completed']
-        })
-    
-    return performance_data
+            'Average Score': round(float(average), 1),  # Round to nearest decimal place
+            'Number of Students Failed': int(failed),
+            'Number of Students Not Completed': int(not_completed)
+        }
+        for category, average, failed, not_completed in branch_agg.itertuples(name=None)
+    ]
+
+# Pools with more sessions than this are drawn with WebGL instead of one SVG marker each
+SCATTER_WEBGL_THRESHOLD = int(os.getenv("SCATTER_WEBGL_THRESHOLD", 5000))
+# Most points sent to the browser for one scatter; larger pools are downsampled
+SCATTER_MAX_POINTS = int(os.getenv("SCATTER_MAX_POINTS", 20000))
+
+# Keep the lowest and highest score of each of max_points // 2 consecutive session index
+# buckets, so the shape of the series and every outlier survive the downsampling
+def downsample_scores(score_df, max_points=SCATTER_MAX_POINTS):
+    if len(score_df) <= max_points:
+        return score_df
+    scores = score_df['Performance'].to_numpy(dtype=float)
+    positions = np.flatnonzero(~np.isnan(scores))
+    buckets = positions * (max_points // 2) // len(score_df)
+
+    # Sorted by bucket, then score: the first and last row of each bucket are its extremes
+    order = np.lexsort((scores[positions], buckets))
+    boundaries = buckets[order][1:] != buckets[order][:-1]
+    first = order[np.r_[True, boundaries]]
+    last = order[np.r_[boundaries, True]]
+    return score_df.iloc[np.union1d(positions[first], positions[last])]
+
+# The histogram (per branch and sub-category) and its percentiles come straight from the
+# cube's score buckets; only the per-session scatter and density views need raw sessions
+def render_score_distribution(cube, selected_test_id, selected_test):
+    view = st.radio("Score view", ["Scatter", "Histogram", "Density"], horizontal=True)
+
+    if view == "Histogram":
+        branch_column, score_column = st.columns(2)
+        branches = [row['Category'] for row in cube.branch_performance([selected_test_id])]
+        branch = branch_column.selectbox("Branch", ["All branches"] + branches)
+        score = score_column.selectbox("Score", ["Overall"] + cube.sub_category_names())
+        label = " / ".join(name for name in (branch, score) if name not in ("All branches", "Overall"))
+
+        with timed("Score Histogram", kind="chart"):
+            edges, counts = cube.histogram(
+                pool_ids=[selected_test_id],
+                categories=None if branch == "All branches" else [branch],
+                sub_categories=[OVERALL if score == "Overall" else score],
+            )
+            histogram_fig = px.bar(x=(edges[:-1] + edges[1:]) / 2,
+                                   y=counts,
+                                   labels={"x": "Performance Score", "y": "Number of Sessions"},
+                                   title=f"Score Distribution for {selected_test}" + (f" ({label})" if label else ""))
+            histogram_fig.update_traces(width=edges[1] - edges[0])
+            st.plotly_chart(histogram_fig)
+
+        if counts.sum():
+            quantiles = {column: histogram_quantiles(counts, q, edges)[0] for column, q in QUANTILES.items()}
+            st.caption(", ".join(f"{column.replace(' Score', '')}: {value:.1f}" for column, value in quantiles.items())
+                       + f" across {counts.sum():,} sessions")
+        return
+
+    sessions = get_interview_sessions([selected_test_id])
+    score_df = pd.DataFrame({
+        'ID': [session[0] for session in sessions],
+        'Pool ID': [session[1] for session in sessions],
+        'Performance': pd.to_numeric(pd.Series([session[2] for session in sessions]), errors='coerce'),
+    })
+
+    if view == "Scatter":
+        with timed("Scatter Plot of Scores", kind="chart"):
+            plot_df = downsample_scores(score_df)
+            scatter_fig = px.scatter(plot_df,
+                                     x=plot_df.index,
+                                     y="Performance",
+                                     color="Performance",
+                                     hover_data={"ID": True, "Performance": True, "Pool ID": True},
+                                     labels={"Performance": "Performance Score", "index": "Session Index"},
+                                     render_mode="webgl" if len(plot_df) > SCATTER_WEBGL_THRESHOLD else "svg")
 
+            scatter_fig.update_layout(title=f"Scatter Plot of Scores for {selected_test}",
+                                      xaxis_title="Session Index",
+                                      yaxis_title="Performance Score")
+            st.plotly_chart(scatter_fig)
+        if len(plot_df) < len(score_df):
+            st.caption(f"Showing {len(plot_df):,} of {len(score_df):,} sessions: the lowest and highest score in each index range")
+        return
+
+    scores = score_df['Performance'].to_numpy(dtype=float)
+    valid = ~np.isnan(scores)
+    if not valid.any():
+        st.write(f"No scores available for {selected_test}.")
+        return
+    score_range = (min(0.0, scores[valid].min()), max(100.0, scores[valid].max()))
+
+    with timed("Score Density", kind="chart"):
+        index = np.arange(len(scores))[valid]
+        counts, index_edges, score_edges = np.histogram2d(
+            index, scores[valid], bins=(min(100, len(index)), 50), range=((0, len(scores)), score_range)
+        )
+        density_fig = go.Figure(go.Heatmap(z=counts.T,
+                                           x=(index_edges[:-1] + index_edges[1:]) / 2,
+                                           y=(score_edges[:-1] + score_edges[1:]) / 2,
+                                           colorscale="Viridis",
+                                           colorbar=dict(title="Sessions")))
+        density_fig.update_layout(title=f"Score Density by Session Index for {selected_test}",
+                                  xaxis_title="Session Index",
+                                  yaxis_title="Performance Score")
+        st.plotly_chart(density_fig)
 
 def test_analysis_page():
     st.title("Skill-2030 Dashboard - Test Analysis")
 
-    # Fetch interview data
-    interview_data = get_interview_data()
+    date_range = selected_date_range()
+    interview_data = get_interview_data(*date_range)
     interview_df = pd.DataFrame(interview_data, columns=["ID", "Name", "Invitation", "Created On", "Num Candidates", "End Time", "Start Time"])
 
     if interview_df.empty:
@@ -69,94 +162,73 @@ def test_analysis_page():
 
     # Select an interview pool
     selected_test = st.selectbox("Select an Interview Pool", interview_df["Name"].tolist())
-    selected_test_id = interview_df[interview_df["Name"] == selected_test]["ID"].iloc[0]
+    selected_test_id = int(interview_df[interview_df["Name"] == selected_test]["ID"].iloc[0])
 
-    # Fetch interview sessions
-    pool_ids = interview_df["ID"].tolist()
-    interview_sessions = get_interview_sessions(pool_ids)
+    # Cube of only the selected pool's sessions and candidates, loaded concurrently; each
+    # pool is cached separately, so switching back to a pool doesn't reload or regroup it
+    cube = load_datasets(cube_datasets(lambda: [selected_test_id]))["cube"]
 
-    # Filter by selected interview pool
-    filtered_sessions = [session for session in interview_sessions if session[1] == selected_test_id]
-
-    if not filtered_sessions:
+    if cube.cells.empty:
         st.write(f"No Data available for {selected_test}.")
         return
 
-    # Fetch student data
-    students_df = get_students()
-    
-    if students_df.empty:
-        st.write("No student data available.")
-        return
-
-    # Categorize students and filter by interview pool
-    categorized_students_df = categorize_students(students_df)
-    categorized_students_df = categorized_students_df[categorized_students_df['Pool ID'] == selected_test_id]
+    render_data_as_of(("interview_data", *date_range), *cube_sources([selected_test_id]))
 
     # Display branch-wise student distribution
     st.write(f"**Branch-wise student distribution for {selected_test}:**")
 
-    branch_distribution = categorized_students_df.groupby('Category').size().reset_index(name='Count')
+    branch_distribution = cube.candidate_counts([selected_test_id]).drop(columns='Pool ID')
     st.dataframe(branch_distribution)
 
     # Display branch-wise score distribution as bar chart with labels on top of each bar
     st.write(f"Branch-wise score distribution for {selected_test}:")
     
-    bar_fig = px.bar(branch_distribution, 
-                     x='Category', 
-                     y='Count', 
-                     text='Count',
-                     labels={"Category": "Branch", "Count": "Number of Students"},
-                     title=f"Branch-wise Score Distribution for {selected_test}")
-
-    bar_fig.update_traces(texttemplate='%{text}', textposition='outside')
-    bar_fig.update_layout(uniformtext_minsize=10, uniformtext_mode='hide')
-
-    st.plotly_chart(bar_fig)
-
-    # Category Analysis using interactive Pie/Donut chart with Plotly
-    fig = go.Figure(data=[go.Pie(labels=branch_distribution['Category'], 
-                                 values=branch_distribution['Count'], 
-                                 hole=.5, 
-                                 hoverinfo="label+percent+value",
-                                 textinfo="label+percent")])
-    fig.update_layout(title_text=f"Category Analysis for {selected_test}",
-                      annotations=[dict(text='Donut', x=0.5, y=0.5, font_size=20, showarrow=False)])
-    st.plotly_chart(fig)
-
-    # Scatter plot showing scores for each session using Plotly
-    score_df = pd.DataFrame(filtered_sessions, columns=["ID", "Pool ID", "Performance", "Is Completed", "Details"])
-    
-    scatter_fig = px.scatter(score_df, 
-                             x=score_df.index, 
-                             y="Performance", 
-                             color="Performance", 
-                             hover_data={"ID": True, "Performance": True, "Pool ID": True},
-                             labels={"Performance": "Performance Score", "index": "Session Index"})
-    
-    scatter_fig.update_layout(title=f"Scatter Plot of Scores for {selected_test}",
-                              xaxis_title="Session Index",
-                              yaxis_title="Performance Score")
-    st.plotly_chart(scatter_fig)
+    with timed("Branch-wise Score Distribution", kind="chart"):
+        bar_fig = px.bar(branch_distribution, 
+                         x='Category', 
+                         y='Count', 
+                         text='Count',
+                         labels={"Category": "Branch", "Count": "Number of Students"},
+                         title=f"Branch-wise Score Distribution for {selected_test}")
+
+        bar_fig.update_traces(texttemplate='%{text}', textposition='outside')
+        bar_fig.update_layout(uniformtext_minsize=10, uniformtext_mode='hide')
+
+        st.plotly_chart(bar_fig)
+
+    with timed("Category Analysis", kind="chart"):
+        # Category Analysis using interactive Pie/Donut chart with Plotly
+        fig = go.Figure(data=[go.Pie(labels=branch_distribution['Category'], 
+                                     values=branch_distribution['Count'], 
+                                     hole=.5, 
+                                     hoverinfo="label+percent+value",
+                                     textinfo="label+percent")])
+        fig.update_layout(title_text=f"Category Analysis for {selected_test}",
+                          annotations=[dict(text='Donut', x=0.5, y=0.5, font_size=20, showarrow=False)])
+        st.plotly_chart(fig)
+
+    # Session scores as a scatter, or as histogram / density views binned on the server
+    render_score_distribution(cube, selected_test_id, selected_test)
 
     # Get branch performance data
-    branch_performance_data = get_branch_performance_data(filtered_sessions, categorized_students_df)
+    branch_performance_data = cube.branch_performance([selected_test_id])
     if branch_performance_data:
         branch_performance_df = pd.DataFrame(branch_performance_data)
         st.dataframe(branch_performance_df)
 
-        performance_bar_fig = px.bar(branch_performance_df, 
-                                    x='Category', 
-                                    y='Average Score', 
-                                    text='Average Score',
-                                    color='Category',
-                                    labels={"Category": "Branch", "Average Score": "Average Performance Score"},
-                                    title=f"Branch-wise Average Performance for {selected_test}")
+        with timed("Branch-wise Average Performance", kind="chart"):
+            performance_bar_fig = px.bar(branch_performance_df, 
+                                        x='Category', 
+                                        y='Average Score', 
+                                        text='Average Score',
+                                        color='Category',
+                                        labels={"Category": "Branch", "Average Score": "Average Performance Score"},
+                                        title=f"Branch-wise Average Performance for {selected_test}")
 
-        performance_bar_fig.update_traces(texttemplate='%{text}', textposition='outside')
-        performance_bar_fig.update_layout(uniformtext_minsize=10, uniformtext_mode='hide', margin=dict(t=50, b=50, l=50, r=50))
+            performance_bar_fig.update_traces(texttemplate='%{text}', textposition='outside')
+            performance_bar_fig.update_layout(uniformtext_minsize=10, uniformtext_mode='hide', margin=dict(t=50, b=50, l=50, r=50))
 
-        st.plotly_chart(performance_bar_fig)
+            st.plotly_chart(performance_bar_fig)
 
         # Melt the DataFrame to long format for easier plotting with Plotly
         branch_performance_melted = branch_performance_df.melt(id_vars='Category', 
@@ -164,21 +236,22 @@ def test_analysis_page():
                                                                 var_name='Metric', 
                                                                 value_name='Value')
 
-        # Line chart for branch performance metrics
-        line_fig = px.line(branch_performance_melted, 
-                           x='Category', 
-                           y='Value', 
-                           color='Metric',
-                           markers=True,
-                           labels={"Category": "Branch", "Value": "Value", "Metric": "Metric"},
-                           title=f"Branch-wise Performance Metrics for {selected_test}")
-
-        line_fig.update_layout(xaxis_title='Branch', 
-                               yaxis_title='Value',
-                               legend_title='Metric',
-                               margin=dict(t=50, b=50, l=50, r=50))
-
-        st.plotly_chart(line_fig)
+        with timed("Branch-wise Performance Metrics", kind="chart"):
+            # Line chart for branch performance metrics
+            line_fig = px.line(branch_performance_melted, 
+                               x='Category', 
+                               y='Value', 
+                               color='Metric',
+                               markers=True,
+                               labels={"Category": "Branch", "Value": "Value", "Metric": "Metric"},
+                               title=f"Branch-wise Performance Metrics for {selected_test}")
+
+            line_fig.update_layout(xaxis_title='Branch', 
+                                   yaxis_title='Value',
+                                   legend_title='Metric',
+                                   margin=dict(t=50, b=50, l=50, r=50))
+
+            st.plotly_chart(line_fig)
 
     else:
         st.write("No branch performance data available.")
\ No newline at end of file
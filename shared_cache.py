@@ -0,0 +1,314 @@
+#shared_cache.py
+
+# Cache shared by every dashboard process on a host (or, with a network store, across
+# replicas), sitting behind the per-process SWR caches in data_cache.py. A process that
+# misses in memory first looks here; if the shared value is missing or older than the
+# dataset's TTL it takes a per-key lock, so only one process runs the query while the
+# others wait and then read its result.
+#
+#   SHARED_CACHE=none (default)      per-process caching only
+#   SHARED_CACHE=file                pickles under SHARED_CACHE_DIR, coalesced with flock
+#   SHARED_CACHE=redis://host:6379/0 network store (needs the `redis` package)
+#
+# Entries are unpickled, so whoever can write them can run code in the dashboard. The file
+# backend therefore needs an explicit SHARED_CACHE_DIR, creates it private (0o700) and
+# refuses a directory or entry owned by another user or writable by group or others.
+#
+# NetworkBackend only uses get/set/delete/scan_iter, so LocalStore can stand in for the
+# network store when exercising the adapter without a server.
+
+import fnmatch
+import hashlib
+import logging
+import os
+import pickle
+import stat
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process coalescing, entries are still shared
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SHARED_CACHE = os.getenv("SHARED_CACHE", "none")
+SHARED_CACHE_DIR = os.getenv("SHARED_CACHE_DIR")
+# Bump whenever the shape of a cached dataset changes, so a new deploy never unpickles
+# values written by an older one
+CACHE_SCHEMA_VERSION = 2
+# Prefix for every key, so deployments with incompatible datasets don't read each other's values
+SHARED_CACHE_NAMESPACE = f'{os.getenv("SHARED_CACHE_NAMESPACE", "skill-2030")}-v{CACHE_SCHEMA_VERSION}'
+# Longest a process waits for another one's fetch before running the query itself
+SHARED_CACHE_LOCK_TIMEOUT = float(os.getenv("SHARED_CACHE_LOCK_TIMEOUT", 120))
+# Entries unused for this long are dropped by the network store, and file entries written
+# longer ago than this are ignored (seconds)
+SHARED_CACHE_MAX_AGE = int(os.getenv("SHARED_CACHE_MAX_AGE", 86400))
+
+def _digest(args):
+    return hashlib.sha256(repr(args).encode()).hexdigest()
+
+# Raises PermissionError unless st (of a file or directory) belongs to this user and is not
+# writable by anyone else
+def _check_private(path, st):
+    if hasattr(os, "getuid") and st.st_uid != os.getuid():
+        raise PermissionError(f"Shared cache path {path} is owned by another user")
+    if st.st_mode & 0o022:
+        raise PermissionError(f"Shared cache path {path} is writable by other users")
+
+class FileBackend:
+    def __init__(self, directory, namespace=SHARED_CACHE_NAMESPACE, max_age=SHARED_CACHE_MAX_AGE):
+        if not directory:
+            raise ValueError("SHARED_CACHE=file needs SHARED_CACHE_DIR")
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        st = os.lstat(directory)
+        if not stat.S_ISDIR(st.st_mode):
+            raise PermissionError(f"Shared cache path {directory} is not a directory")
+        _check_private(directory, st)
+        self.directory = os.path.join(directory, namespace)
+        self.max_age = max_age
+
+    def _path(self, name, args, suffix):
+        return os.path.join(self.directory, name, _digest(args) + suffix)
+
+    def _makedirs(self, path):
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+
+    # (stored_at, value) or None
+    def get(self, name, args):
+        path = self._path(name, args, ".pkl")
+        try:
+            with open(path, "rb") as f:
+                st = os.fstat(f.fileno())
+                _check_private(path, st)
+                if self.max_age is not None and time.time() - st.st_mtime > self.max_age:
+                    return None
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except PermissionError:
+            logger.warning("Refusing shared cache entry %s%r", name, args, exc_info=True)
+            return None
+        except Exception:
+            logger.warning("Discarding unreadable shared cache entry %s%r", name, args, exc_info=True)
+            return None
+
+    def set(self, name, args, value, stored_at=None):
+        path = self._path(name, args, ".pkl")
+        self._makedirs(path)
+        # Write to a temporary file and rename, so readers never see a partial pickle
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((stored_at or time.time(), value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def delete(self, name, args=None):
+        if args is not None:
+            paths = [self._path(name, args, ".pkl")]
+        else:
+            dataset_dir = os.path.join(self.directory, name)
+            paths = [
+                os.path.join(dataset_dir, file_name)
+                for file_name in (os.listdir(dataset_dir) if os.path.isdir(dataset_dir) else [])
+                if file_name.endswith(".pkl")
+            ]
+        for path in paths:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    # Exclusive per-key lock across processes; yields False if it timed out
+    @contextmanager
+    def lock(self, name, args, timeout=SHARED_CACHE_LOCK_TIMEOUT):
+        if fcntl is None:
+            yield False
+            return
+        path = self._path(name, args, ".lock")
+        self._makedirs(path)
+        with open(path, "a") as f:
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        yield False
+                        return
+                    time.sleep(0.05)
+            try:
+                yield True
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+class NetworkBackend:
+    def __init__(self, client, namespace=SHARED_CACHE_NAMESPACE, max_age=SHARED_CACHE_MAX_AGE):
+        self.client = client
+        self.namespace = namespace
+        self.max_age = max_age
+
+    def _key(self, name, args):
+        return f"{self.namespace}:{name}:{_digest(args)}"
+
+    def get(self, name, args):
+        raw = self.client.get(self._key(name, args))
+        return None if raw is None else pickle.loads(raw)
+
+    def set(self, name, args, value, stored_at=None):
+        raw = pickle.dumps((stored_at or time.time(), value), protocol=pickle.HIGHEST_PROTOCOL)
+        self.client.set(self._key(name, args), raw, ex=self.max_age)
+
+    def delete(self, name, args=None):
+        if args is not None:
+            self.client.delete(self._key(name, args))
+            return
+        for key in list(self.client.scan_iter(match=f"{self.namespace}:{name}:*")):
+            self.client.delete(key)
+
+    @contextmanager
+    def lock(self, name, args, timeout=SHARED_CACHE_LOCK_TIMEOUT):
+        key = "lock:" + self._key(name, args)
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + timeout
+        # The lock expires on its own, so a crashed holder can't block other replicas forever
+        while not self.client.set(key, token, nx=True, px=int(timeout * 1000)):
+            if time.monotonic() >= deadline:
+                yield False
+                return
+            time.sleep(0.05)
+        try:
+            yield True
+        finally:
+            # Only release our own lock (it may have expired and been taken by someone else)
+            current = self.client.get(key)
+            if current is not None and (current.decode() if isinstance(current, bytes) else current) == token:
+                self.client.delete(key)
+
+# In-process stand-in for the subset of the redis client API NetworkBackend uses
+class LocalStore:
+    def __init__(self):
+        self._data = {}  # key -> (value, expires_at or None)
+        self._lock = threading.Lock()
+
+    def _live(self, key):
+        item = self._data.get(key)
+        if item is not None and item[1] is not None and time.monotonic() >= item[1]:
+            del self._data[key]
+            return None
+        return item
+
+    def get(self, key):
+        with self._lock:
+            item = self._live(key)
+            return None if item is None else item[0]
+
+    def set(self, key, value, ex=None, px=None, nx=False):
+        with self._lock:
+            if nx and self._live(key) is not None:
+                return None
+            ttl = px / 1000 if px is not None else ex
+            self._data[key] = (value, None if ttl is None else time.monotonic() + ttl)
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def scan_iter(self, match="*"):
+        with self._lock:
+            keys = [key for key in list(self._data) if self._live(key) is not None]
+        return iter([key for key in keys if fnmatch.fnmatchcase(key, match)])
+
+def backend_from_setting(setting):
+    if not setting or setting == "none":
+        return None
+    if setting == "file":
+        return FileBackend(SHARED_CACHE_DIR)
+    if setting.startswith(("redis://", "rediss://", "unix://")):
+        import redis  # optional dependency, only needed for a network store
+        return NetworkBackend(redis.Redis.from_url(setting))
+    raise ValueError(f"Unknown SHARED_CACHE setting: {setting!r}")
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = backend_from_setting(SHARED_CACHE) or False
+    return _backend or None
+
+def set_backend(backend):
+    global _backend
+    with _backend_lock:
+        _backend = backend if backend is not None else False
+
+def _fresh(item, ttl):
+    return item is not None and (ttl is None or time.time() - item[0] < ttl)
+
+# (value, stored_at) if the shared value is younger than ttl, else None. Like the helpers
+# below, backend failures are logged and treated as a miss rather than raised.
+def get_fresh(backend, name, args, ttl):
+    try:
+        item = backend.get(name, args)
+    except Exception as exc:
+        logger.warning("Shared cache unavailable for %s%r: %s", name, args, exc)
+        return None
+    return (item[1], item[0]) if _fresh(item, ttl) else None
+
+def publish(backend, name, args, value, stored_at=None):
+    try:
+        backend.set(name, args, value, stored_at)
+    except Exception as exc:
+        logger.warning("Could not publish %s%r to the shared cache: %s", name, args, exc)
+
+def discard(backend, name, args=None):
+    try:
+        backend.delete(name, args)
+    except Exception as exc:
+        logger.warning("Could not drop %s%s from the shared cache: %s", name, "" if args is None else repr(args), exc)
+
+# Shared value for (name, args) if it is younger than ttl, otherwise load it: under the
+# key's lock, re-check (another process may have just stored it), then call loader() and
+# publish the result. Returns (value, stored_at, outcome): stored_at is the epoch time the
+# value was loaded, and outcome is "hit", "coalesced" or "miss".
+# If the backend fails the value is still loaded (or returned) without it; errors raised
+# by loader() itself propagate unchanged.
+def get_or_load(backend, name, args, ttl, loader):
+    loading = False
+    stored_at = None
+    value = _MISSING = object()
+    try:
+        item = backend.get(name, args)
+        if _fresh(item, ttl):
+            return item[1], item[0], "hit"
+        with backend.lock(name, args) as locked:
+            if locked:
+                item = backend.get(name, args)
+                if _fresh(item, ttl):
+                    return item[1], item[0], "coalesced"
+            loading = True
+            stored_at = time.time()
+            value = loader()
+            loading = False
+            backend.set(name, args, value, stored_at)
+            return value, stored_at, "miss"
+    except Exception as exc:
+        if loading:
+            raise
+        logger.warning("Shared cache unavailable for %s%r: %s", name, args, exc)
+        if value is _MISSING:
+            stored_at = time.time()
+            value = loader()
+        return value, stored_at, "miss"
@@ -0,0 +1,223 @@
+#snapshot.py
+
+# Offline snapshot builder: runs the db_logic fetchers and the dashboard processing once
+# and writes the results as versioned Parquet files, which the dashboard can serve
+# instead of querying Postgres (DASHBOARD_DATA_SOURCE=snapshot).
+#
+#   python snapshot.py build [--root snapshots] [--keep 5]
+#   python snapshot.py list [--root snapshots]
+
+import argparse
+import json
+import os
+import shutil
+import threading
+from datetime import datetime, timezone
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from instrumentation import record_cache, timed
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "snapshots")
+LATEST_FILE = "LATEST"
+MANIFEST_FILE = "manifest.json"
+
+POOL_COLUMNS = ["ID", "Name", "Invitation", "Created On", "Num Candidates", "End Time", "Start Time"]
+
+def snapshot_mode():
+    return os.getenv("DASHBOARD_DATA_SOURCE", "database").lower() == "snapshot"
+
+def latest_version(root=None):
+    root = root or SNAPSHOT_DIR
+    try:
+        with open(os.path.join(root, LATEST_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def list_versions(root=None):
+    root = root or SNAPSHOT_DIR
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        name for name in os.listdir(root)
+        if os.path.isfile(os.path.join(root, name, MANIFEST_FILE))
+    )
+
+def write_snapshot(datasets, root=None, version=None):
+    root = root or SNAPSHOT_DIR
+    version = version or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    path = os.path.join(root, version)
+
+    # Write into a staging directory and rename it, so readers never see a partial snapshot
+    staging = path + ".tmp"
+    os.makedirs(staging, exist_ok=False)
+    for name, df in datasets.items():
+        df.to_parquet(os.path.join(staging, f"{name}.parquet"), engine="pyarrow", index=False)
+
+    manifest = {
+        "version": version,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "datasets": {name: {"rows": len(df), "columns": list(map(str, df.columns))} for name, df in datasets.items()},
+    }
+    with open(os.path.join(staging, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.rename(staging, path)
+
+    # Point LATEST at the new version atomically
+    latest_tmp = os.path.join(root, LATEST_FILE + ".tmp")
+    with open(latest_tmp, "w") as f:
+        f.write(version)
+    os.replace(latest_tmp, os.path.join(root, LATEST_FILE))
+    return version
+
+def prune_snapshots(keep, root=None):
+    root = root or SNAPSHOT_DIR
+    current = latest_version(root)
+    removed = []
+    for version in list_versions(root)[:-keep] if keep > 0 else []:
+        if version != current:
+            shutil.rmtree(os.path.join(root, version))
+            removed.append(version)
+    return removed
+
+def read_manifest(version=None, root=None):
+    root = root or SNAPSHOT_DIR
+    version = version or latest_version(root)
+    with open(os.path.join(root, version, MANIFEST_FILE)) as f:
+        return json.load(f)
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+# Snapshot files are immutable once written, so each (version, dataset) is read into pandas
+# once per process and the frame is shared by every session; callers must not mutate it
+def read_snapshot_table(name, version=None, root=None):
+    root = root or SNAPSHOT_DIR
+    version = version or latest_version(root)
+    if version is None:
+        raise FileNotFoundError(f"No snapshot found in {root!r}; run `python snapshot.py build` first")
+
+    key = (os.path.abspath(root), version, name)
+    with _tables_lock:
+        if key not in _tables:
+            record_cache(f"snapshot:{name}", "miss")
+            with timed(f"read_snapshot_table:{name}"):
+                table = pq.read_table(os.path.join(root, version, f"{name}.parquet"))
+                _tables[key] = table.to_pandas()
+        else:
+            record_cache(f"snapshot:{name}", "hit")
+        return _tables[key]
+
+# Conversions between the structures the pages use and flat frames that fit in Parquet
+
+def batch_counts_frame(batch_counts):
+    return pd.DataFrame(list(batch_counts.items()), columns=["Batch Year", "Count"])
+
+def batch_counts_from_frame(df):
+    return {int(year): int(count) for year, count in zip(df["Batch Year"], df["Count"])}
+
+def performance_frames(performance_data):
+    pool_rows, sub_category_rows = [], []
+    for pool in performance_data:
+        pool_rows.append({key: value for key, value in pool.items() if key != 'Sub-Category Averages'})
+        for sub_category, sub_data in pool['Sub-Category Averages'].items():
+            sub_category_rows.append({'Pool ID': pool['Pool ID'], 'Sub-Category': sub_category, **sub_data})
+
+    metrics = ['Average Score', 'Number of Students Failed', 'Number of Students Not Completed']
+    return (
+        pd.DataFrame(pool_rows, columns=['Pool ID'] + metrics),
+        pd.DataFrame(sub_category_rows, columns=['Pool ID', 'Sub-Category'] + metrics),
+    )
+
+def performance_data_from_frames(pool_df, sub_category_df, pool_ids=None):
+    if pool_ids is not None:
+        pool_df = pool_df[pool_df['Pool ID'].isin(pool_ids)]
+
+    sub_categories = {}
+    for pool_id, sub_category, average, failed, not_completed in sub_category_df.itertuples(index=False, name=None):
+        sub_categories.setdefault(pool_id, {})[sub_category] = {
+            'Average Score': average,
+            'Number of Students Failed': int(failed),
+            'Number of Students Not Completed': int(not_completed)
+        }
+
+    return [
+        {
+            'Pool ID': pool_id,
+            'Average Score': average,
+            'Number of Students Failed': int(failed),
+            'Number of Students Not Completed': int(not_completed),
+            'Sub-Category Averages': sub_categories.get(pool_id, {})
+        }
+        for pool_id, average, failed, not_completed in pool_df.itertuples(index=False, name=None)
+    ]
+
+def sessions_frame(interview_sessions):
+    # The raw details payload is not needed once the aggregates are built
+    return pd.DataFrame(
+        [session[:4] for session in interview_sessions],
+        columns=["ID", "Pool ID", "Performance", "Is Completed"]
+    )
+
+def sessions_from_frame(df, pool_ids=None):
+    if pool_ids is not None:
+        df = df[df['Pool ID'].isin(pool_ids)]
+    return [(*row, None) for row in df.itertuples(index=False, name=None)]
+
+def build_snapshot(root=None):
+    from db_logic import db_connection, fetch_student_count_by_batch, fetch_interview_data, fetch_students, fetch_interview_sessions
+
+    with db_connection() as conn:
+        batch_counts = fetch_student_count_by_batch(conn)
+        interview_data = fetch_interview_data(conn)
+        pool_ids = [row[0] for row in interview_data]
+        students_df = fetch_students(conn)
+        interview_sessions = fetch_interview_sessions(conn, pool_ids)
+
+    return write_snapshot(snapshot_datasets(batch_counts, interview_data, students_df, interview_sessions), root=root)
+
+# Turn fetched rows into the snapshot tables, processing them the way the pages do
+def snapshot_datasets(batch_counts, interview_data, students_df, interview_sessions):
+    # Imported here so reading snapshots doesn't pull in the database and app modules
+    from db_logic import process_performance_data
+    from app import categorize_students
+
+    # Candidates for every batch; names and emails stay out of the snapshot files
+    candidates_df = categorize_students(students_df, year=None).drop(columns=["Name", "Email"])
+
+    pool_performance_df, sub_category_performance_df = performance_frames(process_performance_data(interview_sessions))
+
+    return {
+        "batch_counts": batch_counts_frame(batch_counts),
+        "pools": pd.DataFrame(interview_data, columns=POOL_COLUMNS),
+        "candidates": candidates_df,
+        "sessions": sessions_frame(interview_sessions),
+        "pool_performance": pool_performance_df,
+        "sub_category_performance": sub_category_performance_df,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and inspect Skill-2030 dashboard snapshots")
+    parser.add_argument("--root", default=SNAPSHOT_DIR, help="Directory holding snapshot versions")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Fetch from Postgres and write a new snapshot version")
+    build_parser.add_argument("--keep", type=int, default=0, help="Keep only the newest N versions (0 keeps all)")
+    subparsers.add_parser("list", help="List snapshot versions")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        version = build_snapshot(args.root)
+        print(f"Wrote snapshot {version}")
+        for name, info in read_manifest(version, args.root)["datasets"].items():
+            print(f"  {name}: {info['rows']} rows")
+        for removed in prune_snapshots(args.keep, args.root):
+            print(f"Removed snapshot {removed}")
+    elif args.command == "list":
+        current = latest_version(args.root)
+        for version in list_versions(args.root):
+            print(f"{version}{'  (latest)' if version == current else ''}")
+
+if __name__ == "__main__":
+    main()
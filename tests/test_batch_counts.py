@@ -0,0 +1,46 @@
+#tests/test_batch_counts.py
+
+import pytest
+
+from db_logic import connect_to_db, count_students_by_batch, fetch_student_count_by_batch
+
+EMAILS = [
+    "22pa1a0253@vishnu.edu.in",
+    "22pa1a0254@vishnu.edu.in",
+    "21pa5a0401@vishnu.edu.in",   # lateral entry: one batch earlier
+    "18pa5a1201@vishnu.edu.in",   # lateral entry into 2017
+    "17pa1a0501@vishnu.edu.in",
+    "16pa1a0501@vishnu.edu.in",   # before 2017
+    "17pa5a0501@vishnu.edu.in",   # lateral entry into 2016
+    "ab12pa1a05@vishnu.edu.in",   # no digit prefix
+    "2xpa1a0501@vishnu.edu.in",   # one digit only
+    "١٢pa1a0501@vishnu.edu.in",   # non-ASCII digits
+    "x@vishnu.edu.in",
+    "22pa1a0253@gmail.com",       # other domain (filtered by the query)
+]
+
+EXPECTED = {2017: 2, 2020: 1, 2022: 2}
+
+def test_count_students_by_batch():
+    emails = [email for email in EMAILS if email.endswith("@vishnu.edu.in")]
+    assert count_students_by_batch(emails) == EXPECTED
+
+# Both paths against a temporary users_user, which shadows the real table for this connection
+@pytest.fixture
+def users_conn():
+    try:
+        conn = connect_to_db()
+    except Exception as exc:
+        pytest.skip(f"No database configured: {exc}")
+    cur = conn.cursor()
+    cur.execute("CREATE TEMP TABLE users_user (id serial PRIMARY KEY, email text NOT NULL);")
+    cur.executemany("INSERT INTO users_user (email) VALUES (%s);", [(email,) for email in EMAILS])
+    cur.close()
+    yield conn
+    conn.rollback()
+    conn.close()
+
+def test_server_side_matches_python(users_conn):
+    server = fetch_student_count_by_batch(users_conn)
+    python = fetch_student_count_by_batch(users_conn, server_side=False)
+    assert server == python == EXPECTED
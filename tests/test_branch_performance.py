@@ -0,0 +1,86 @@
+#tests/test_branch_performance.py
+
+import json
+import random
+
+import pandas as pd
+import pytest
+
+from cube import QUANTILES, build_cube
+from page.test_analysis import get_branch_performance_data
+from test_performance_engines import generate_sessions
+
+# get_branch_performance_data as it was before the lookup rewrite: scans the candidates
+# for every session. It fails on NULL performances and on sessions with several
+# candidates, so the data compared below has neither.
+def original_branch_performance(interview_sessions, categorized_students_df):
+    branch_scores = {}
+    for session in interview_sessions:
+        session_id, pool_id, performance, is_completed, details = session
+        if isinstance(details, str):
+            details = json.loads(details)
+        student_category = categorized_students_df[categorized_students_df['Session ID'] == session_id]['Category'].values
+        if not student_category:
+            continue
+        student_category = student_category[0]
+        if student_category not in branch_scores:
+            branch_scores[student_category] = {'scores': [], 'num_failed': 0, 'not_completed': 0}
+        branch_scores[student_category]['scores'].append(performance)
+        if performance < 70:
+            branch_scores[student_category]['num_failed'] += 1
+        if not is_completed:
+            branch_scores[student_category]['not_completed'] += 1
+
+    performance_data = []
+    for category, data in branch_scores.items():
+        avg_score = sum(data['scores']) / len(data['scores']) if data['scores'] else None
+        performance_data.append({
+            'Category': category,
+            'Average Score': round(avg_score, 1),
+            'Number of Students Failed': data['num_failed'],
+            'Number of Students Not Completed': data['not_completed']
+        })
+    return performance_data
+
+# One candidate for about two thirds of the sessions, in a shuffled order
+def candidates_for(sessions, seed):
+    rng = random.Random(seed)
+    matched = [session for session in sessions if rng.random() < 0.67]
+    rng.shuffle(matched)
+    return pd.DataFrame({
+        'Session ID': [session[0] for session in matched],
+        'Pool ID': [session[1] for session in matched],
+        'Category': [rng.choice(["CSE", "ECE", "EEE", "MECH", "CIVIL"]) for _ in matched],
+    })
+
+def assert_same_branches(actual, expected):
+    assert [branch['Category'] for branch in actual] == [branch['Category'] for branch in expected]
+    for branch, expected_branch in zip(actual, expected):
+        # Averages are summed in a different order; rounding may differ at a .x5 boundary
+        assert branch['Average Score'] == pytest.approx(expected_branch['Average Score'], abs=0.1)
+        assert branch['Number of Students Failed'] == expected_branch['Number of Students Failed']
+        assert branch['Number of Students Not Completed'] == expected_branch['Number of Students Not Completed']
+
+# The original tests a one-element array for truth, which numpy deprecates for empty ones
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+@pytest.mark.parametrize("seed", range(3))
+def test_matches_original_implementation(seed):
+    sessions = [session for session in generate_sessions(1500, seed) if session[2] is not None]
+    candidates = candidates_for(sessions, seed)
+    expected = original_branch_performance(sessions, candidates)
+    assert_same_branches(get_branch_performance_data(sessions, candidates), expected)
+
+@pytest.mark.parametrize("seed", range(3))
+def test_cube_matches_reference(seed):
+    sessions = sorted(session for session in generate_sessions(1500, seed) if session[2] is not None)
+    candidates = candidates_for(sessions, seed)
+    # A second candidate row for some sessions: the first one decides the branch
+    candidates = pd.concat([candidates, candidates.iloc[::5].assign(Category="OTHER")], ignore_index=True)
+    expected = get_branch_performance_data(sessions, candidates)
+    pool_ids = list(dict.fromkeys(session[1] for session in sessions))
+    branches = build_cube(sessions, candidates).branch_performance(pool_ids)
+    assert_same_branches([{k: v for k, v in branch.items() if k not in QUANTILES} for branch in branches], expected)
+    assert "OTHER" not in [branch['Category'] for branch in branches]
+
+def test_no_sessions():
+    assert get_branch_performance_data([], candidates_for([], 0)) == []
@@ -0,0 +1,96 @@
+#tests/test_categorize_students.py
+
+import pandas as pd
+import pytest
+
+from app import BRANCH_CATEGORIES, categorize_students
+
+# categorize_students as it was before the lookup table: one Python call per email for
+# the year and one for the branch, then a filter to the 2021 batch
+def original_categorize_students(students_df):
+    def get_category(email_suffix):
+        for code, category in [('05', 'CSE'), ('54', 'AI-DS'), ('04', 'ECE'), ('12', 'IT'), ('01', 'CIVIL'),
+                               ('02', 'EEE'), ('03', 'ME'), ('61', 'AI-ML'), ('57', 'CS&BS')]:
+            if email_suffix.startswith(code):
+                return category
+        return 'Other'
+
+    def extract_year(email):
+        try:
+            return int(email[:2])
+        except ValueError:
+            return None
+
+    students_df['Year'] = students_df['Email'].apply(lambda x: extract_year(x))
+    students_df['Category'] = students_df['Email'].apply(lambda x: get_category(x.split('@')[0][-4:]))
+    return students_df[students_df['Year'] == 21]
+
+EMAILS = [
+    # every branch code in the 2021 batch, regular and lateral entry
+    *[f"21pa1a{code}{index:02d}@vishnu.edu.in" for index, code in enumerate(BRANCH_CATEGORIES)],
+    "21pa5a0412@vishnu.edu.in",
+    "21pa1a9901@vishnu.edu.in",     # unknown branch code
+    "21pa1a05@vishnu.edu.in",       # short roll number: the branch code comes from "1a05"
+    "21@vishnu.edu.in",             # nothing but the year
+    "21pa1a0501@gmail.com",         # other domains are categorized the same way
+    "21pa1a1201@students.example.org",
+    "21pa1a0501",                   # no domain at all
+    "",                             # empty
+    # year boundaries
+    "20pa1a0501@vishnu.edu.in",
+    "22pa1a0501@vishnu.edu.in",
+    "2pa1a0501@vishnu.edu.in",
+    "021pa1a0501@vishnu.edu.in",
+    "12pa1a2101@vishnu.edu.in",
+    # bad prefixes
+    "ab21pa0501@vishnu.edu.in",
+    "2x21pa0501@vishnu.edu.in",
+    "-1pa1a0501@vishnu.edu.in",
+    " 21pa1a0501@vishnu.edu.in",
+    "+21pa1a0501@vishnu.edu.in",
+    "x@vishnu.edu.in",
+]
+
+def students(emails):
+    return pd.DataFrame({
+        'ID': range(len(emails)),
+        'Email': emails,
+        'Pool ID': [index % 3 for index in range(len(emails))],
+        'Session ID': range(100, 100 + len(emails)),
+    })
+
+def test_matches_original_categorization():
+    expected = original_categorize_students(students(EMAILS))
+    actual = categorize_students(students(EMAILS))
+    assert actual.index.tolist() == expected.index.tolist()
+    assert actual['Email'].tolist() == expected['Email'].tolist()
+    assert actual['Category'].astype(str).tolist() == expected['Category'].tolist()
+    assert (actual['Year'] == 21).all()
+
+def test_does_not_modify_its_input():
+    students_df = students(EMAILS)
+    categorize_students(students_df)
+    assert list(students_df.columns) == ['ID', 'Email', 'Pool ID', 'Session ID']
+
+# Year of an email as the original parsed it
+def year_of(email):
+    try:
+        return int(email[:2])
+    except ValueError:
+        return None
+
+@pytest.mark.parametrize("year", [20, 22, 2, 12, -1])
+def test_other_batches(year):
+    categorized = categorize_students(students(EMAILS), year=year)
+    assert categorized['Email'].tolist() == [email for email in EMAILS if year_of(email) == year]
+
+def test_every_batch():
+    categorized = categorize_students(students(EMAILS), year=None)
+    assert categorized['Email'].tolist() == EMAILS
+    assert categorized['Year'].dtype == 'Int16'
+    assert [None if pd.isna(year) else year for year in categorized['Year']] == [year_of(email) for email in EMAILS]
+
+def test_no_candidates():
+    categorized = categorize_students(pd.DataFrame(columns=['ID', 'Email', 'Pool ID', 'Session ID']))
+    assert categorized.empty
+    assert 'Category' in categorized
@@ -0,0 +1,166 @@
+#tests/test_compact.py
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import compact
+from app import categorize_students
+from compact import PII_COLUMNS, compact_dataset, compact_frame, compact_session, compaction_ratio, deep_sizeof
+from db_logic import process_performance_data
+
+@pytest.fixture(autouse=True)
+def clean_totals():
+    compact.reset()
+    yield
+    compact.reset()
+
+# Candidate rows as fetch_students returns them: ids with NULLs come back as floats
+def make_students(n=1000):
+    rng = np.random.default_rng(0)
+    codes = rng.choice(["05", "54", "04", "12", "99"], n)
+    return pd.DataFrame({
+        "Student ID": np.arange(1, n + 1, dtype="int64"),
+        "Pool ID": rng.choice([3, 7, 40_000], n).astype("int64"),
+        "Name": [f"Student {index}" for index in range(n)],
+        "Email": [f"21pa1a{code}{index % 100:02d}@vishnu.edu.in" for index, code in enumerate(codes)],
+        "Mentor ID": np.where(rng.random(n) < 0.2, np.nan, rng.integers(1, 300, n)).astype("float64"),
+        "CGPA": np.round(rng.uniform(5, 10, n), 2),
+        "Placed": rng.choice([True, False, None], n),
+        "Active": rng.random(n) < 0.5,
+    })
+
+def test_compact_frame_dtypes():
+    students_df = make_students()
+    compacted = compact_frame(students_df, drop=PII_COLUMNS)
+
+    assert list(compacted.columns) == ["Student ID", "Pool ID", "Mentor ID", "CGPA", "Placed", "Active"]
+    assert compacted.dtypes.to_dict() == {
+        "Student ID": np.dtype("int16"),
+        "Pool ID": np.dtype("int32"),
+        "Mentor ID": pd.Int16Dtype(),
+        "CGPA": np.dtype("float64"),
+        "Placed": pd.BooleanDtype(),
+        "Active": np.dtype("bool"),
+    }
+    assert deep_sizeof(compacted) < deep_sizeof(students_df.drop(columns=PII_COLUMNS))
+
+def test_compact_frame_round_trips_values():
+    students_df = make_students()
+    compacted = compact_frame(students_df, drop=PII_COLUMNS, categorical=["Pool ID"])
+    expected = students_df.drop(columns=PII_COLUMNS)
+
+    pd.testing.assert_index_equal(compacted.index, expected.index)
+    for column in ["Student ID", "Pool ID", "Mentor ID", "CGPA", "Active"]:
+        pd.testing.assert_series_equal(compacted[column].astype(expected[column].dtype), expected[column])
+    assert compacted["Placed"].isna().tolist() == expected["Placed"].isna().tolist()
+    assert (compacted["Placed"].dropna() == expected["Placed"].dropna().astype(bool)).all()
+
+def test_compact_frame_leaves_the_input_alone():
+    students_df = make_students()
+    before = students_df.copy()
+    compact_frame(students_df, drop=PII_COLUMNS, categorical=["Pool ID"])
+    pd.testing.assert_frame_equal(students_df, before)
+
+def test_category_columns():
+    df = pd.DataFrame({
+        "Category": ["CSE", "ECE", "CSE", "Other"],
+        "Branch": pd.Categorical(["CSE", "ECE", "CSE", "Other"], categories=["CSE", "ECE", "IT", "Other"]),
+        "Pool ID": [3, 3, 7, 7],
+    })
+    compacted = compact_frame(df, categorical=["Category", "Branch", "Pool ID"])
+
+    assert all(isinstance(compacted[column].dtype, pd.CategoricalDtype) for column in compacted.columns)
+    assert list(compacted["Branch"].cat.categories) == ["CSE", "ECE", "IT", "Other"]
+    assert compacted["Category"].tolist() == df["Category"].tolist()
+    assert compacted["Pool ID"].astype("int64").tolist() == df["Pool ID"].tolist()
+    assert (compacted.groupby("Branch", observed=False).size() == [2, 1, 0, 1]).all()
+
+# pandas tries the narrower integer casts first, which warns for values past their range
+@pytest.mark.filterwarnings("ignore:invalid value encountered in cast:RuntimeWarning")
+@pytest.mark.parametrize("values, dtype", [
+    ([1.0, np.nan, 3.0], pd.Int8Dtype()),
+    ([-200.0, np.nan, 0.0], pd.Int16Dtype()),
+    ([1.0, 2.0, 70_000.0], pd.Int32Dtype()),
+    ([np.nan, 3_000_000_000.0], pd.Int64Dtype()),
+])
+def test_whole_floats_become_nullable_integers(values, dtype):
+    series = pd.Series(values, index=[10, 20, 30][:len(values)])
+    compacted = compact_frame(pd.DataFrame({"Value": series}))["Value"]
+    assert compacted.dtype == dtype
+    assert compacted.isna().tolist() == series.isna().tolist()
+    pd.testing.assert_series_equal(compacted.astype("float64"), series, check_names=False)
+
+@pytest.mark.parametrize("values", [[1.5, np.nan], [np.nan, np.nan], [1.0, np.inf], [-np.inf, np.nan], [1e20, 2.0]])
+def test_other_floats_are_kept(values):
+    df = pd.DataFrame({"Value": values})
+    assert compact_frame(df)["Value"].dtype == np.dtype("float64")
+
+def test_mixed_object_columns_are_kept():
+    df = pd.DataFrame({"Flag": [True, "yes", None], "Name": ["a", "b", None]})
+    assert (compact_frame(df).dtypes == object).all()
+
+def test_empty_frame():
+    students_df = make_students().iloc[0:0]
+    compacted = compact_frame(students_df, drop=PII_COLUMNS)
+    assert compacted.empty
+    assert "Email" not in compacted.columns
+
+def test_categorized_students_round_trip():
+    students_df = make_students()
+    categorized = categorize_students(students_df)
+    compacted = compact_frame(categorized, drop=PII_COLUMNS)
+
+    assert compacted["Year"].tolist() == categorized["Year"].tolist()
+    assert compacted["Category"].tolist() == categorized["Category"].tolist()
+    assert compacted.groupby("Category", observed=True).size().to_dict() == (
+        categorized.groupby("Category", observed=True).size().to_dict()
+    )
+
+def test_compact_dataset_records_the_savings(monkeypatch):
+    monkeypatch.setattr(compact, "COMPACT_STORAGE", True)
+    students_df = make_students()
+    compacted = compact_dataset("students", students_df, drop=PII_COLUMNS)
+    assert "Email" not in compacted.columns
+    assert compaction_ratio("students") == deep_sizeof(students_df) / deep_sizeof(compacted)
+    assert compaction_ratio("students") > 1
+    assert compaction_ratio("other") is None
+
+def test_compact_dataset_off(monkeypatch):
+    monkeypatch.setattr(compact, "COMPACT_STORAGE", False)
+    students_df = make_students()
+    assert compact_dataset("students", students_df, drop=PII_COLUMNS) is students_df
+    assert compaction_ratio("students") is None
+
+def test_compact_session_keeps_only_scores():
+    details = {
+        "Aptitude": {"score": 62.5, "answers": ["a", "b"], "time_taken": 300},
+        "Coding": {"score": 0, "language": "python"},
+        "Feedback": "good",
+        "Notes": {"text": "no score"},
+    }
+    session = (11, 3, 31.25, 1, json.dumps(details), "extra column")
+    assert compact_session(session) == (11, 3, 31.25, True, {"Aptitude": {"score": 62.5}, "Coding": {"score": 0}})
+    assert compact_session(session[:4] + (details,)) == compact_session(session)
+
+@pytest.mark.parametrize("details", [None, {}, "{}", "null"])
+def test_compact_session_without_details(details):
+    assert compact_session((1, 2, None, None, details)) == (1, 2, None, False, {})
+
+def test_compacted_sessions_aggregate_the_same():
+    rng = np.random.default_rng(1)
+    sessions = [
+        (
+            session_id, int(rng.choice([3, 7])), float(rng.uniform(0, 100)), bool(rng.random() < 0.8),
+            {
+                str(name): {"score": float(rng.uniform(0, 100)), "answers": list(range(5))}
+                for name in rng.choice(["Aptitude", "Coding", "Verbal"], int(rng.integers(0, 4)), replace=False)
+            },
+        )
+        for session_id in range(500)
+    ]
+    compacted = [compact_session(session) for session in sessions]
+    assert process_performance_data(compacted, engine="python") == process_performance_data(sessions, engine="python")
+    assert deep_sizeof(compacted) < deep_sizeof(sessions)
@@ -0,0 +1,172 @@
+#tests/test_connection_pool.py
+
+import threading
+import time
+
+import psycopg2
+import pytest
+
+import db_logic
+from db_logic import ConnectionPool, db_connection
+
+# Stand-in for a psycopg2 connection: broken ones fail every statement, like a
+# connection whose server went away
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        if self.broken:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, params=None):
+        if self.conn.broken:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+
+    def fetchone(self):
+        return (1,)
+
+    def close(self):
+        pass
+
+class Connector:
+    def __init__(self):
+        self.made = []
+
+    def __call__(self):
+        conn = FakeConnection()
+        self.made.append(conn)
+        return conn
+
+def pool(**kwargs):
+    connect = Connector()
+    return ConnectionPool(connect=connect, **kwargs), connect
+
+def test_invalid_sizes():
+    for sizes in [{"min_size": -1}, {"max_size": 0}, {"min_size": 3, "max_size": 2}]:
+        with pytest.raises(ValueError):
+            ConnectionPool(connect=Connector(), **sizes)
+
+def test_released_connections_are_reused():
+    connections, connect = pool()
+    conn = connections.acquire()
+    connections.release(conn)
+    assert connections.acquire() is conn
+    assert len(connect.made) == 1
+    assert conn.rollbacks == 1
+
+def test_acquire_times_out_when_exhausted():
+    connections, _ = pool(max_size=2)
+    connections.acquire()
+    connections.acquire()
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        connections.acquire(timeout=0.05)
+    assert time.monotonic() - started >= 0.05
+
+def test_waiting_acquire_gets_released_connection():
+    connections, connect = pool(max_size=1)
+    conn = connections.acquire()
+    threading.Timer(0.05, connections.release, args=(conn,)).start()
+    assert connections.acquire(timeout=5) is conn
+    assert len(connect.made) == 1
+
+def test_idle_connections_are_pruned_down_to_min_size():
+    connections, connect = pool(min_size=1, idle_timeout=0.01)
+    first, second = connections.acquire(), connections.acquire()
+    connections.release(first)
+    connections.release(second)
+    time.sleep(0.02)
+    # The oldest idle connection is closed; min_size keeps the other one open
+    assert connections.acquire() is second
+    assert first.closed and not second.closed
+    assert len(connect.made) == 2
+
+def test_idle_connections_are_pruned_to_zero():
+    connections, connect = pool(min_size=0, idle_timeout=0.01)
+    conn = connections.acquire()
+    connections.release(conn)
+    time.sleep(0.02)
+    assert connections.acquire() is not conn
+    assert conn.closed
+    assert len(connect.made) == 2
+
+def test_broken_connections_are_discarded_on_release():
+    connections, connect = pool(max_size=1)
+    conn = connections.acquire()
+    conn.broken = True
+    connections.release(conn)
+    assert conn.closed
+    # The slot was freed, so the pool can open a replacement at max_size
+    replacement = connections.acquire(timeout=0.05)
+    assert replacement is not conn
+    assert len(connect.made) == 2
+
+def test_release_with_discard():
+    connections, _ = pool(max_size=1)
+    conn = connections.acquire()
+    connections.release(conn, discard=True)
+    assert conn.closed
+    assert connections.acquire(timeout=0.05) is not conn
+
+def test_health_check_replaces_dead_idle_connections():
+    connections, connect = pool(max_size=1, health_check_after=0)
+    conn = connections.acquire()
+    connections.release(conn)
+    conn.broken = True
+    replacement = connections.acquire(timeout=0.05)
+    assert replacement is not conn
+    assert conn.closed
+    assert len(connect.made) == 2
+
+def test_health_check_keeps_live_idle_connections():
+    connections, connect = pool(health_check_after=0)
+    conn = connections.acquire()
+    connections.release(conn)
+    assert connections.acquire() is conn
+    assert len(connect.made) == 1
+
+def test_recently_used_connections_are_not_pinged():
+    connections, _ = pool(health_check_after=60)
+    conn = connections.acquire()
+    connections.release(conn)
+    conn.broken = True
+    # Within health_check_after the connection is handed out without a ping
+    assert connections.acquire() is conn
+
+def test_failed_connect_frees_its_slot():
+    attempts = []
+
+    def connect():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise psycopg2.OperationalError("could not connect to server")
+        return FakeConnection()
+
+    connections = ConnectionPool(max_size=1, connect=connect)
+    with pytest.raises(psycopg2.OperationalError):
+        connections.acquire()
+    assert connections.acquire(timeout=0.05) is not None
+
+def test_db_connection_returns_the_connection_on_error(monkeypatch):
+    connections, connect = pool(max_size=1)
+    monkeypatch.setattr(db_logic, "_pool", connections)
+    with pytest.raises(RuntimeError):
+        with db_connection() as conn:
+            raise RuntimeError("query failed")
+    with db_connection(timeout=0.05) as again:
+        assert again is conn
+    assert len(connect.made) == 1
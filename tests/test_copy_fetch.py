@@ -0,0 +1,80 @@
+#tests/test_copy_fetch.py
+
+import pandas as pd
+import pytest
+
+from db_logic import connect_to_db, fetch_interview_sessions, fetch_students
+
+CANDIDATES = [
+    # id, name, email, invited, pool_id, session_id, selected
+    (1, "Plain", "22pa1a0253@vishnu.edu.in", True, 1, 10, False),
+    (2, 'Comma, "quoted"\nand a newline', "21pa5a0401@vishnu.edu.in", False, 1, None, True),
+    (3, "", None, None, 1, 11, None),
+    (4, "\\N", "\\N", True, 2, None, False),
+    (5, None, "x@vishnu.edu.in", True, 2, None, None),
+    (6, "Ünïcödé", "17pa1a0501@vishnu.edu.in", True, 3, 12, True),
+]
+
+SESSIONS = [
+    # id, pool_id, performance, is_completed, details
+    (10, 1, "72.50", True, '{"coding": {"score": 72.5}, "aptitude": {"score": 60}}'),
+    (11, 1, None, None, None),
+    (12, 1, "69.999", False, "{}"),
+    (13, 2, "100", True, '{"notes": "line one\\nline two, \\"quoted\\"", "marker": "\\\\N"}'),
+    (14, 2, "0", None, '{"coding": {"score": null}, "nested": [1, 2.5, {"ü": true}]}'),
+]
+
+# Temporary tables shadow the real ones for this connection. performance is numeric here,
+# which psycopg2 would return as Decimal without the cast in the session query.
+@pytest.fixture
+def conn():
+    try:
+        conn = connect_to_db()
+    except Exception as exc:
+        pytest.skip(f"No database configured: {exc}")
+    cur = conn.cursor()
+    cur.execute("""
+    CREATE TEMP TABLE interviews_candidate (
+        id integer PRIMARY KEY, name text, email text, invited boolean,
+        pool_id integer, session_id integer, selected boolean
+    );
+    CREATE TEMP TABLE interviews_interviewsession (
+        id integer PRIMARY KEY, pool_id integer, performance numeric, is_completed boolean, details json
+    );
+    """)
+    cur.executemany("INSERT INTO interviews_candidate VALUES (%s, %s, %s, %s, %s, %s, %s);", CANDIDATES)
+    cur.executemany("INSERT INTO interviews_interviewsession VALUES (%s, %s, %s, %s, %s);", SESSIONS)
+    cur.close()
+    yield conn
+    conn.rollback()
+    conn.close()
+
+def assert_same_frame(copy, cursor):
+    pd.testing.assert_frame_equal(copy, cursor)
+    for column in cursor.columns:
+        assert [type(value) for value in copy[column]] == [type(value) for value in cursor[column]], column
+
+@pytest.mark.parametrize("pool_ids", [None, [1], [2], [3], [1, 2, 3], [99]])
+def test_fetch_students_copy_matches_cursor(conn, pool_ids):
+    cursor = fetch_students(conn, pool_ids, method="cursor")
+    copy = fetch_students(conn, pool_ids, method="copy")
+    assert_same_frame(copy, cursor)
+
+def test_fetch_students_keeps_text_values(conn):
+    copy = fetch_students(conn, method="copy").set_index("ID")
+    assert copy.loc[2, "Name"] == CANDIDATES[1][1]
+    assert copy.loc[3, "Name"] == ""
+    assert copy.loc[4, "Name"] == copy.loc[4, "Email"] == "\\N"
+    assert copy.loc[5, "Name"] is None
+
+@pytest.mark.parametrize("pool_ids", [[1], [2], [1, 2], [99]])
+def test_fetch_interview_sessions_copy_matches_cursor(conn, pool_ids):
+    cursor = sorted(fetch_interview_sessions(conn, pool_ids, method="cursor"))
+    copy = sorted(fetch_interview_sessions(conn, pool_ids, method="copy"))
+    assert copy == cursor
+    assert [tuple(map(type, session)) for session in copy] == [tuple(map(type, session)) for session in cursor]
+    assert all(isinstance(session[2], (float, type(None))) for session in copy)
+
+def test_unknown_method(conn):
+    with pytest.raises(ValueError):
+        fetch_students(conn, method="parquet")
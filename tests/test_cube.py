@@ -0,0 +1,147 @@
+#tests/test_cube.py
+
+import threading
+
+import pandas as pd
+import pytest
+
+import cube
+from cube import BUCKET_COLUMNS, QUANTILES, UNMATCHED, CubeCache, build_cube
+from db_logic import process_performance_data
+from test_performance_engines import assert_same_performance, generate_sessions
+
+# Candidates for every other session, in one of three branch categories
+def candidates_for(sessions):
+    matched = sessions[::2]
+    return pd.DataFrame({
+        'Session ID': [session[0] for session in matched],
+        'Pool ID': [session[1] for session in matched],
+        'Category': pd.Categorical([["CSE", "ECE", "EEE"][session[0] % 3] for session in matched]),
+    })
+
+def without_quantiles(performance_data):
+    return [
+        {
+            **{key: value for key, value in pool.items() if key not in QUANTILES},
+            'Sub-Category Averages': {
+                sub_category: {key: value for key, value in sub_data.items() if key not in QUANTILES}
+                for sub_category, sub_data in pool['Sub-Category Averages'].items()
+            },
+        }
+        for pool in performance_data
+    ]
+
+@pytest.mark.parametrize("seed", range(3))
+def test_pool_performance_matches_python_engine(seed):
+    sessions = generate_sessions(2000, seed)
+    expected = process_performance_data(sessions, engine="python")
+    pool_ids = [pool['Pool ID'] for pool in expected]
+    cube = build_cube(sessions, candidates_for(sessions))
+    assert_same_performance(without_quantiles(cube.pool_performance(pool_ids)), expected)
+
+def test_branch_performance_leaves_out_unmatched_sessions():
+    sessions = generate_sessions(500, seed=3)
+    cube = build_cube(sessions, candidates_for(sessions))
+    branches = cube.branch_performance(list({session[1] for session in sessions}))
+    assert sorted(branch['Category'] for branch in branches) == ["CSE", "ECE", "EEE"]
+    assert UNMATCHED not in [branch['Category'] for branch in branches]
+
+def test_null_scores_stay_out_of_histogram():
+    sessions = [(1, 5, None, False, None), (2, 6, 50.0, True, None)]
+    cube = build_cube(sessions, candidates_for([]))
+    assert cube.histogram(pool_ids=[5])[1].sum() == 0
+    assert cube.histogram(pool_ids=[6])[1].sum() == 1
+    assert [pool['Average Score'] for pool in cube.pool_performance([5, 6])] == [None, 50.0]
+
+# A stream is built in batches whose cells are merged; the result matches a build from the
+# sessions sorted by id, cell order included
+@pytest.mark.parametrize("batch_size", [1, 7, 250, 10000])
+def test_streamed_build_matches_list_build(monkeypatch, batch_size):
+    sessions = sorted(generate_sessions(1000, seed=6))
+    sessions[3] = sessions[3][:2] + (None,) + sessions[3][3:]
+    expected = build_cube(sessions, candidates_for(sessions))
+    monkeypatch.setattr(cube, "BUILD_BATCH_SIZE", batch_size)
+    streamed = build_cube(iter(sessions), candidates_for(sessions))
+    pd.testing.assert_frame_equal(streamed.cells, expected.cells)
+    pool_ids = list(dict.fromkeys(session[1] for session in sessions))
+    assert streamed.sub_category_names() == expected.sub_category_names()
+    # Score sums are added up in a different order, so averages may differ in the last bits
+    assert_same_performance(streamed.pool_performance(pool_ids), expected.pool_performance(pool_ids))
+    assert streamed.branch_performance(pool_ids) == expected.branch_performance(pool_ids)
+
+def test_streamed_build_of_nothing():
+    assert build_cube(iter(()), candidates_for([])).cells.empty
+
+def test_histogram_of_unscored_sessions_stays_integer():
+    cube = build_cube([(1, 5, None, False, None)], candidates_for([]))
+    assert (cube.cells[BUCKET_COLUMNS].dtypes == "int64").all()
+
+def test_split_cubes_concatenate_back():
+    sessions = generate_sessions(500, seed=4)
+    cube = build_cube(sessions, candidates_for(sessions))
+    pool_ids = list(dict.fromkeys(session[1] for session in sessions))
+    cache = CubeCache()
+    load = lambda stale: ([s for s in sessions if s[1] in stale], candidates_for([s for s in sessions if s[1] in stale]))
+    assembled = cache.get(pool_ids, 2022, [1] * len(pool_ids), load)
+    assert assembled.pool_performance(pool_ids) == cube.pool_performance(pool_ids)
+
+def test_cache_loads_each_version_once():
+    sessions = generate_sessions(200, seed=5)
+    pool_ids = list(dict.fromkeys(session[1] for session in sessions))
+    loads = []
+
+    def load(stale):
+        loads.append(list(stale))
+        return [s for s in sessions if s[1] in stale], candidates_for([])
+
+    cache = CubeCache()
+    first = cache.get(pool_ids, 2022, [1] * len(pool_ids), load)
+    assert cache.get(pool_ids, 2022, [1] * len(pool_ids), load) is first
+    cache.get(pool_ids[:2], 2022, [1, 1], load)
+    assert loads == [pool_ids]
+    cache.get(pool_ids[:2], 2022, [1, 2], load)
+    assert loads == [pool_ids, [pool_ids[1]]]
+
+def test_other_pools_do_not_wait_for_a_build():
+    sessions = [(1, 1, 80.0, True, {}), (2, 2, 60.0, True, {})]
+    cache = CubeCache()
+    release = threading.Event()
+    loading = threading.Event()
+
+    def slow_load(stale):
+        loading.set()
+        assert release.wait(5)
+        return [s for s in sessions if s[1] in stale], candidates_for([])
+
+    def fast_load(stale):
+        return [s for s in sessions if s[1] in stale], candidates_for([])
+
+    slow = threading.Thread(target=cache.get, args=([1], 2022, [1], slow_load))
+    slow.start()
+    assert loading.wait(5)
+    # Pool 2 is built while pool 1's load is still running
+    assert cache.get([2], 2022, [1], fast_load).pool_performance([2])[0]['Average Score'] == 60.0
+    release.set()
+    slow.join(5)
+    assert not slow.is_alive()
+
+def test_concurrent_requests_for_a_pool_load_it_once():
+    sessions = [(1, 1, 80.0, True, {})]
+    cache = CubeCache()
+    loads = []
+    barrier = threading.Barrier(4)
+
+    def load(stale):
+        loads.append(stale)
+        return sessions, candidates_for([])
+
+    def request():
+        barrier.wait()
+        cache.get([1], 2022, [1], load)
+
+    threads = [threading.Thread(target=request) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert len(loads) == 1
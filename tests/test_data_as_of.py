@@ -0,0 +1,54 @@
+#tests/test_data_as_of.py
+
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+import app
+import data_cache
+from app import cube_sources, data_as_of
+from data_cache import SWRCache
+
+# Session store stand-in with fixed per-pool refresh times
+class FakeSessionStore:
+    def __init__(self, as_of):
+        self._as_of = as_of
+
+    def as_of(self, pool_ids=None):
+        timestamps = [self._as_of[pool_id] for pool_id in pool_ids if pool_id in self._as_of]
+        return min(timestamps) if timestamps else None
+
+@pytest.fixture
+def caches(monkeypatch):
+    monkeypatch.delenv("DASHBOARD_DATA_SOURCE", raising=False)
+    monkeypatch.setattr(data_cache, "get_backend", lambda: None)
+    for name in ("categorized_students", "sub_category_performance", "student_counts"):
+        monkeypatch.setitem(data_cache.CACHES, name, SWRCache(name, lambda *args: args))
+    return data_cache.CACHES
+
+def test_cube_sources_name_each_displayed_pool():
+    assert cube_sources([7, 3, 7], year=22) == [
+        ("sessions", [7, 3]), ("categorized_students", 7, 22), ("categorized_students", 3, 22)
+    ]
+
+def test_cube_captions_ignore_pools_not_displayed(caches, monkeypatch):
+    caches["categorized_students"].get(1, 21)
+    time.sleep(0.01)
+    caches["categorized_students"].get(2, 21)
+    caches["categorized_students"].get(2, 22)
+    monkeypatch.setattr(app, "get_session_store", lambda: FakeSessionStore(
+        {1: datetime(2020, 1, 1, tzinfo=timezone.utc), 2: datetime.now(timezone.utc)}
+    ))
+    assert data_as_of(*cube_sources([2])) == caches["categorized_students"].as_of(2, 21)
+    assert data_as_of(*cube_sources([1, 2])) == datetime(2020, 1, 1, tzinfo=timezone.utc)
+    assert data_as_of(*cube_sources([3])) is None
+
+def test_cached_entries_are_dated_by_their_arguments(caches):
+    caches["sub_category_performance"].get((1, 2))
+    time.sleep(0.01)
+    caches["sub_category_performance"].get((3,))
+    assert data_as_of(("sub_category_performance", (3,))) > data_as_of(("sub_category_performance", (1, 2)))
+    assert data_as_of("sub_category_performance") is None
+    caches["student_counts"].get()
+    assert data_as_of("student_counts") == caches["student_counts"].as_of()
@@ -0,0 +1,216 @@
+#tests/test_data_cache.py
+
+import threading
+import time
+
+import pytest
+
+import data_cache
+from data_cache import SWRCache, dataset_ttl
+from shared_cache import FileBackend
+
+# Per-process caching only, whatever SHARED_CACHE the environment sets
+@pytest.fixture(autouse=True)
+def no_shared_cache(monkeypatch):
+    monkeypatch.setattr(data_cache, "get_backend", lambda: None)
+
+# Loader returning (args, call number), recording every call
+class Loader:
+    def __init__(self, delay=0.0, fail=False):
+        self.calls = []
+        self.delay = delay
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def __call__(self, *args):
+        time.sleep(self.delay)
+        with self.lock:
+            self.calls.append(args)
+            if self.fail:
+                raise RuntimeError("query failed")
+            return (args, len(self.calls))
+
+# load_many counterpart: one call for many keys
+class BulkLoader(Loader):
+    def __call__(self, keys):
+        time.sleep(self.delay)
+        with self.lock:
+            self.calls.append(list(keys))
+            if self.fail:
+                raise RuntimeError("query failed")
+            return {key: (key, len(self.calls)) for key in keys}
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+def run_together(*targets):
+    threads = [threading.Thread(target=target) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+def test_loads_once_and_serves_hits():
+    loader = Loader()
+    cache = SWRCache("test", loader, ttl=60)
+    first = cache.get(1, "a")
+    assert cache.get(1, "a") is first
+    assert cache.get(2, "a") != first
+    assert loader.calls == [(1, "a"), (2, "a")]
+
+def test_concurrent_first_requests_share_one_load():
+    loader = Loader(delay=0.05)
+    cache = SWRCache("test", loader)
+    results = []
+    run_together(*[lambda: results.append(cache.get(1)) for _ in range(5)])
+    assert loader.calls == [(1,)]
+    assert len({id(result) for result in results}) == 1
+
+def test_expired_entries_are_served_stale_and_refreshed_in_the_background():
+    loader = Loader()
+    cache = SWRCache("test", loader, ttl=0.05)
+    first = cache.get(1)
+    version = cache.version(1)
+    time.sleep(0.06)
+    # The stale value comes back at once; the reload happens on another thread
+    assert cache.get(1) is first
+    wait_for(lambda: cache.version(1) != version)
+    assert cache.get(1) == ((1,), 2)
+    assert len(loader.calls) == 2
+
+def test_failed_refresh_keeps_the_stale_value():
+    loader = Loader()
+    cache = SWRCache("test", loader, ttl=0.02)
+    first = cache.get(1)
+    loader.fail = True
+    time.sleep(0.03)
+    assert cache.get(1) is first
+    wait_for(lambda: len(loader.calls) == 2)
+    wait_for(lambda: not cache._entries[(1,)].refreshing)
+    assert cache.get(1) is first
+    # The next access past the TTL retries
+    loader.fail = False
+    wait_for(lambda: cache.get(1) != first)
+
+def test_ttl_for_overrides_per_key():
+    loader = Loader()
+    cache = SWRCache("test", loader, ttl=0.01, ttl_for=lambda ttl, past: None if past else ttl)
+    past, current = cache.get(True), cache.get(False)
+    time.sleep(0.02)
+    cache.get(True), cache.get(False)
+    wait_for(lambda: len(loader.calls) == 3)
+    assert cache.get(True) is past
+    assert cache.get(False) != current
+
+def test_invalidate_one_key_or_all():
+    loader = Loader()
+    cache = SWRCache("test", loader)
+    cache.get(1), cache.get(2)
+    cache.invalidate(1)
+    assert cache.version(1) is None and cache.version(2) is not None
+    cache.get(1)
+    assert loader.calls == [(1,), (2,), (1,)]
+    cache.invalidate()
+    assert cache.version(1) is None and cache.version(2) is None
+    assert cache.values() == []
+
+def test_refresh_finishing_after_invalidate_is_dropped():
+    loader = Loader()
+    cache = SWRCache("test", loader, ttl=0.01)
+    cache.get(1)
+    time.sleep(0.02)
+    loader.delay = 0.05
+    cache.get(1)  # starts the background refresh
+    cache.invalidate()
+    time.sleep(0.1)
+    assert cache.version(1) is None
+
+def test_versions_never_repeat():
+    loader = Loader()
+    cache, other = SWRCache("test", loader), SWRCache("other", loader)
+    seen = set()
+    for _ in range(3):
+        cache.get(1), other.get(1)
+        seen.update([cache.version(1), other.version(1)])
+        cache.invalidate(), other.invalidate()
+    assert len(seen) == 6
+    assert cache.version(2) is None
+
+def test_as_of_is_per_key():
+    cache = SWRCache("test", Loader())
+    assert cache.as_of() is None and cache.as_of(1) is None
+    cache.get(1)
+    time.sleep(0.01)
+    cache.get(2)
+    assert cache.as_of(1) < cache.as_of(2)
+    assert cache.as_of() is None
+    assert cache.as_of(3) is None
+    cache.get()
+    assert cache.as_of() > cache.as_of(2)
+
+def test_get_many_loads_missing_keys_in_one_call():
+    load_many = BulkLoader()
+    cache = SWRCache("test", Loader(), ttl=60)
+    cache.get_many([(1,), (2,)], load_many)
+    values = cache.get_many([(2,), (3,), (4,), (3,)], load_many)
+    assert load_many.calls == [[(1,), (2,)], [(3,), (4,)]]
+    assert list(values) == [(2,), (3,), (4,)]
+    assert values[(2,)] == ((2,), 1)
+    # Entries loaded in bulk behave as any other entry
+    assert cache.get(3) is values[(3,)]
+
+def test_get_many_coalesces_concurrent_misses():
+    load_many = BulkLoader(delay=0.05)
+    cache = SWRCache("test", Loader())
+    results = []
+    run_together(
+        lambda: results.append(cache.get_many([(1,), (2,)], load_many)),
+        lambda: results.append(cache.get_many([(2,), (1,)], load_many)),
+        lambda: results.append(cache.get_many([(2,), (3,)], load_many)),
+    )
+    loaded = [key for call in load_many.calls for key in call]
+    assert sorted(loaded) == [(1,), (2,), (3,)]
+    assert len(results) == 3
+    assert len({id(result[(2,)]) for result in results}) == 1
+
+def test_get_waits_for_a_bulk_load_of_its_key():
+    load_many = BulkLoader(delay=0.05)
+    loader = Loader()
+    cache = SWRCache("test", loader)
+    results = []
+    run_together(
+        lambda: results.append(cache.get_many([(1,), (2,)], load_many)[(1,)]),
+        lambda: (time.sleep(0.01), results.append(cache.get(1))),
+    )
+    assert loader.calls == []
+    assert results[0] is results[1]
+
+def test_get_many_failure_releases_its_keys():
+    load_many = BulkLoader(fail=True)
+    cache = SWRCache("test", Loader())
+    with pytest.raises(RuntimeError):
+        cache.get_many([(1,), (2,)], load_many)
+    load_many.fail = False
+    assert cache.get_many([(1,), (2,)], load_many)[(1,)] == ((1,), 2)
+
+def test_get_many_shares_bulk_loads_across_processes(monkeypatch, tmp_path):
+    backend = FileBackend(str(tmp_path / "cache"), namespace="test-v1")
+    monkeypatch.setattr(data_cache, "get_backend", lambda: backend)
+    load_many = BulkLoader()
+    # Two caches stand for the same dataset in two processes
+    first, second = SWRCache("test", Loader(), ttl=60), SWRCache("test", Loader(), ttl=60)
+    first.get_many([(1,), (2,)], load_many)
+    values = second.get_many([(1,), (2,), (3,)], load_many)
+    assert load_many.calls == [[(1,), (2,)], [(3,)]]
+    assert values[(1,)] == ((1,), 1)
+    assert second.as_of(1) == first.as_of(1)
+
+def test_dataset_ttl(monkeypatch):
+    assert dataset_ttl("test_dataset", 600) == 600
+    monkeypatch.setenv("CACHE_TTL_TEST_DATASET", "30")
+    assert dataset_ttl("test_dataset", 600) == 30
+    monkeypatch.setenv("CACHE_TTL_TEST_DATASET", "0")
+    assert dataset_ttl("test_dataset", 600) is None
@@ -0,0 +1,86 @@
+#tests/test_data_loader.py
+
+import threading
+import time
+
+import pytest
+
+from data_loader import DATA_LOADER_WORKERS, load_datasets
+
+def test_no_datasets():
+    assert load_datasets({}) == {}
+
+def test_independent_datasets_run_concurrently():
+    if DATA_LOADER_WORKERS < 2:
+        pytest.skip("needs at least two loader workers")
+    # Each getter only returns once the other has started
+    barrier = threading.Barrier(2, timeout=5)
+
+    def getter(value):
+        return lambda: (barrier.wait(), value)[1]
+
+    assert load_datasets({"a": getter(1), "b": getter(2)}) == {"a": 1, "b": 2}
+
+def test_dependencies_receive_their_inputs_in_order():
+    finished = []
+
+    def getter(name, value, delay=0.0):
+        def load(*inputs):
+            time.sleep(delay)
+            finished.append(name)
+            return value(*inputs)
+        return load
+
+    results = load_datasets({
+        "total": (getter("total", lambda rows, scale: sum(rows) * scale), ["rows", "scale"]),
+        "rows": getter("rows", lambda: [1, 2, 3], delay=0.02),
+        "scale": getter("scale", lambda: 10),
+        "labels": (getter("labels", lambda total: f"total {total}"), ["total"]),
+    })
+    assert results == {"rows": [1, 2, 3], "scale": 10, "total": 60, "labels": "total 60"}
+    assert finished.index("total") > max(finished.index("rows"), finished.index("scale"))
+    assert finished[-1] == "labels"
+
+def test_undeclared_dependency():
+    with pytest.raises(ValueError, match="undeclared"):
+        load_datasets({"a": (lambda rows: rows, ["rows"])})
+
+@pytest.mark.parametrize("specs", [
+    {"a": (lambda b: b, ["b"]), "b": (lambda a: a, ["a"])},
+    {"a": (lambda a: a, ["a"])},
+    # The cycle is only found once the datasets outside it have loaded
+    {"rows": lambda: [1], "a": (lambda rows, c: c, ["rows", "c"]), "c": (lambda a: a, ["a"])},
+])
+def test_cycles_are_reported(specs):
+    with pytest.raises(ValueError, match="cycle"):
+        load_datasets(specs)
+
+def test_getter_errors_propagate_and_stop_dependents():
+    ran = []
+
+    def failing():
+        raise KeyError("pool 7")
+
+    with pytest.raises(KeyError, match="pool 7"):
+        load_datasets({
+            "rows": failing,
+            "total": (lambda rows: ran.append("total"), ["rows"]),
+        })
+    assert ran == []
+
+def test_error_leaves_the_shared_executor_usable():
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        time.sleep(0.05)
+        return "slow"
+
+    def failing():
+        assert started.wait(5)
+        raise RuntimeError("query failed")
+
+    with pytest.raises(RuntimeError):
+        load_datasets({"slow": slow, "failing": failing})
+    # Workers are not left blocked: later pages still load
+    assert load_datasets({"a": lambda: 1, "b": (lambda a: a + 1, ["a"])}) == {"a": 1, "b": 2}
@@ -0,0 +1,80 @@
+#tests/test_date_range.py
+
+from datetime import date, timedelta
+
+import pytest
+
+from app import interview_range_ttl
+from db_logic import _date_bounds, connect_to_db, current_year_range, fetch_interview_data
+
+def test_current_year_range():
+    year = date.today().year
+    assert current_year_range() == (date(year, 1, 1), date(year, 12, 31))
+
+def test_date_bounds_default_to_the_current_year():
+    year = date.today().year
+    assert _date_bounds(None, None) == (date(year, 1, 1), date(year + 1, 1, 1))
+
+def test_date_bounds_of_open_ranges():
+    year = date.today().year
+    assert _date_bounds(date(2020, 5, 1), None) == (date(2020, 5, 1), date(year + 1, 1, 1))
+    assert _date_bounds(None, date(year, 3, 1)) == (date(year, 1, 1), date(year, 3, 2))
+
+def test_date_bounds_include_the_end_date():
+    assert _date_bounds(date(2021, 1, 1), date(2021, 12, 31)) == (date(2021, 1, 1), date(2022, 1, 1))
+    assert _date_bounds(date(2024, 2, 29), date(2024, 2, 29)) == (date(2024, 2, 29), date(2024, 3, 1))
+
+def test_past_ranges_never_expire():
+    yesterday = date.today() - timedelta(days=1)
+    assert interview_range_ttl(600, date(2021, 1, 1), date(2021, 12, 31)) is None
+    assert interview_range_ttl(600, yesterday - timedelta(days=30), yesterday) is None
+
+def test_current_and_open_ended_ranges_expire():
+    today = date.today()
+    assert interview_range_ttl(600, today - timedelta(days=30), today) == 600
+    assert interview_range_ttl(600, *current_year_range()) == 600
+    assert interview_range_ttl(600, today, today + timedelta(days=365)) == 600
+
+# Pools of interviews on either side of a range's boundaries, in temporary tables that
+# shadow the real ones for this connection
+@pytest.fixture
+def conn():
+    try:
+        conn = connect_to_db()
+    except Exception as exc:
+        pytest.skip(f"No database configured: {exc}")
+    cur = conn.cursor()
+    cur.execute("""
+    CREATE TEMP TABLE interviews_assignmentpool (
+        id integer PRIMARY KEY, name text, invitation text, created_on timestamptz,
+        num_candidates integer, end_time timestamptz, start_time timestamptz
+    );
+    CREATE TEMP TABLE interviews_interview (id integer PRIMARY KEY, org_id integer, timestamp timestamptz);
+    CREATE TEMP TABLE interviews_interviewsession (id integer PRIMARY KEY, interview_id integer, pool_id integer);
+    """)
+    interviews = [
+        (1, 1, "2020-12-31 23:59:59"),  # day before the range
+        (2, 1, "2021-01-01 00:00:00"),  # first moment of the range
+        (3, 1, "2021-06-30 23:59:59"),  # last moment of the range
+        (4, 1, "2021-07-01 00:00:00"),  # day after the range
+        (5, 2, "2021-03-01 12:00:00"),  # other org
+    ]
+    cur.executemany("INSERT INTO interviews_interview VALUES (%s, %s, %s);", interviews)
+    cur.executemany(
+        "INSERT INTO interviews_assignmentpool VALUES (%s, %s, 'invite', now(), %s, now(), now());",
+        [(pool_id, f"pool {pool_id}", 10) for pool_id in range(1, 6)] + [(6, "small pool", 9)]
+    )
+    cur.executemany(
+        "INSERT INTO interviews_interviewsession VALUES (%s, %s, %s);",
+        [(interview_id, interview_id, interview_id) for interview_id in range(1, 6)] + [(6, 2, 6)]
+    )
+    cur.close()
+    yield conn
+    conn.rollback()
+    conn.close()
+
+@pytest.mark.parametrize("prepared", [True, False])
+def test_fetch_interview_data_range(conn, prepared):
+    pools = fetch_interview_data(conn, date(2021, 1, 1), date(2021, 6, 30), prepared=prepared)
+    # Pool 6 has too few candidates, pool 5 belongs to another org
+    assert [pool[0] for pool in pools] == [2, 3]
@@ -0,0 +1,80 @@
+#tests/test_downsample_scores.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from page.test_analysis import downsample_scores
+
+# Session scores with a rising trend, noise and a few outliers, in session index order
+def make_scores(n, seed=0):
+    rng = np.random.default_rng(seed)
+    scores = np.clip(np.linspace(30, 70, n) + rng.normal(0, 8, n), 0, 100)
+    scores[rng.choice(n, 5, replace=False)] = [0, 100, 1, 99, 50]
+    return pd.DataFrame({"Session ID": np.arange(1000, 1000 + n), "Performance": scores})
+
+# Lowest and highest score of each bucket of session positions, as downsample_scores() buckets them
+def bucket_extremes(score_df, max_points):
+    scores = score_df['Performance'].reset_index(drop=True).dropna()
+    buckets = scores.index * (max_points // 2) // len(score_df)
+    return scores.groupby(buckets).agg(["min", "max"])
+
+def test_small_input_is_returned_unchanged():
+    score_df = make_scores(100)
+    assert downsample_scores(score_df, max_points=100) is score_df
+
+@pytest.mark.parametrize("n, max_points", [(10_000, 1000), (10_001, 999), (2_500, 2_000), (100_000, 20_000)])
+def test_keeps_every_bucket_extreme(n, max_points):
+    score_df = make_scores(n)
+    sampled = downsample_scores(score_df, max_points)
+
+    assert len(sampled) <= max_points
+    assert sampled.index.is_monotonic_increasing
+    pd.testing.assert_frame_equal(sampled, score_df.loc[sampled.index])
+    assert sampled['Performance'].min() == score_df['Performance'].min()
+    assert sampled['Performance'].max() == score_df['Performance'].max()
+
+    positions = pd.Series(sampled['Performance'].to_numpy(), index=score_df.index.get_indexer(sampled.index))
+    kept = positions.groupby(positions.index * (max_points // 2) // n).agg(["min", "max"])
+    pd.testing.assert_frame_equal(kept, bucket_extremes(score_df, max_points))
+
+def test_keeps_the_shape_of_the_series():
+    score_df = make_scores(200_000)
+    sampled = downsample_scores(score_df, 10_000)
+    positions = score_df.index.get_indexer(sampled.index)
+
+    # Per tenth of the sessions: same range, and the trend is followed
+    original = score_df['Performance'].groupby(np.arange(len(score_df)) * 10 // len(score_df))
+    kept = sampled['Performance'].groupby(positions * 10 // len(score_df))
+    pd.testing.assert_series_equal(kept.min(), original.min())
+    pd.testing.assert_series_equal(kept.max(), original.max())
+    assert np.abs(kept.median().to_numpy() - original.median().to_numpy()).max() < 2
+    assert np.all(np.diff(kept.median().to_numpy()) > 0)
+
+    # Points stay spread over the whole index range
+    assert np.bincount(positions * 100 // len(score_df), minlength=100).min() > 0
+
+def test_outlier_survives():
+    score_df = pd.DataFrame({"Performance": np.full(50_000, 60.0)})
+    score_df.loc[31_337, "Performance"] = 2.0
+    sampled = downsample_scores(score_df, 1000)
+    assert 31_337 in sampled.index
+    assert len(sampled) <= 1000
+
+def test_missing_scores_are_dropped():
+    score_df = make_scores(10_000)
+    score_df.loc[::3, "Performance"] = np.nan
+    score_df.loc[5_000:5_999, "Performance"] = np.nan
+    sampled = downsample_scores(score_df, 1000)
+
+    assert sampled['Performance'].notna().all()
+    assert sampled['Performance'].min() == score_df['Performance'].min()
+    assert sampled['Performance'].max() == score_df['Performance'].max()
+    positions = score_df.index.get_indexer(sampled.index)
+    assert not ((positions >= 5_000) & (positions < 6_000)).any()
+
+def test_non_default_index_is_kept():
+    score_df = make_scores(5_000).set_index("Session ID", drop=False)
+    sampled = downsample_scores(score_df, 500)
+    assert set(sampled.index) <= set(score_df.index)
+    pd.testing.assert_frame_equal(sampled, score_df.loc[sampled.index])
@@ -0,0 +1,99 @@
+#tests/test_performance_engines.py
+
+import json
+import random
+
+import pytest
+
+from db_logic import SessionAggregator, process_performance_data
+
+SUB_CATEGORIES = ["aptitude", "coding", "communication", "technical"]
+
+# Session tuples (id, pool_id, performance, is_completed, details) in a shuffled pool order,
+# with details as dicts or JSON strings, NULL completion flags and performances, sessions
+# without details and sub-category entries without a score
+def generate_sessions(num_sessions, seed=0):
+    rng = random.Random(seed)
+    pool_ids = rng.sample(range(1, 1000), 7)
+    sessions = []
+    for session_id in range(1, num_sessions + 1):
+        details = {
+            sub_category: {'score': round(rng.uniform(0, 100), 2)}
+            for sub_category in rng.sample(SUB_CATEGORIES, rng.randint(0, len(SUB_CATEGORIES)))
+        }
+        if rng.random() < 0.1:
+            details['notes'] = {'comment': 'no score'}
+        if rng.random() < 0.05:
+            details = None
+        elif rng.random() < 0.5:
+            details = json.dumps(details)
+        sessions.append((
+            session_id,
+            rng.choice(pool_ids),
+            None if rng.random() < 0.05 else round(rng.uniform(0, 100), 2),
+            rng.choice([True, False, None]),
+            details,
+        ))
+    return sessions
+
+def assert_same_performance(actual, expected):
+    assert [pool['Pool ID'] for pool in actual] == [pool['Pool ID'] for pool in expected]
+    for pool, expected_pool in zip(actual, expected):
+        assert pool['Average Score'] == pytest.approx(expected_pool['Average Score'])
+        assert pool['Number of Students Failed'] == expected_pool['Number of Students Failed']
+        assert pool['Number of Students Not Completed'] == expected_pool['Number of Students Not Completed']
+        assert list(pool['Sub-Category Averages']) == list(expected_pool['Sub-Category Averages'])
+        for sub_category, sub_data in pool['Sub-Category Averages'].items():
+            assert sub_data == pytest.approx(expected_pool['Sub-Category Averages'][sub_category])
+
+@pytest.mark.parametrize("seed", range(5))
+def test_vectorized_matches_python(seed):
+    sessions = generate_sessions(2000, seed)
+    expected = process_performance_data(sessions, engine="python")
+    assert_same_performance(process_performance_data(sessions, engine="vectorized"), expected)
+
+@pytest.mark.parametrize("seed", range(5))
+def test_session_aggregator_matches_python(seed):
+    sessions = generate_sessions(2000, seed)
+    expected = process_performance_data(sessions, engine="python")
+    assert_same_performance(SessionAggregator().update(sessions).performance_data(), expected)
+
+def test_pools_keep_order_of_first_appearance():
+    sessions = [
+        (1, 30, 80.0, True, {}),
+        (2, 10, 60.0, True, {}),
+        (3, 30, 90.0, False, {}),
+        (4, 20, 50.0, None, {}),
+    ]
+    for engine in ["python", "vectorized"]:
+        assert [pool['Pool ID'] for pool in process_performance_data(sessions, engine=engine)] == [30, 10, 20]
+
+def test_null_performance_is_left_out_of_average_and_failures():
+    sessions = [
+        (1, 1, None, None, '{"coding": {"score": 40}}'),
+        (2, 1, 90.0, True, {"coding": {"score": 80}}),
+        (3, 2, None, False, None),
+    ]
+    for engine in ["python", "vectorized"]:
+        first, second = process_performance_data(sessions, engine=engine)
+        assert first['Average Score'] == 90.0
+        assert first['Number of Students Failed'] == 0
+        assert first['Number of Students Not Completed'] == 1
+        assert first['Sub-Category Averages']['coding'] == {
+            'Average Score': 60.0, 'Number of Students Failed': 1, 'Number of Students Not Completed': 1
+        }
+        assert second['Average Score'] is None
+        assert second['Number of Students Not Completed'] == 1
+        assert second['Sub-Category Averages'] == {}
+
+def test_removing_sessions_restores_aggregates():
+    sessions = generate_sessions(500, seed=1)
+    aggregator = SessionAggregator().update(sessions)
+    for session in sessions[250:]:
+        aggregator.remove(session)
+    expected = process_performance_data(sessions[:250], engine="python")
+    assert_same_performance(aggregator.performance_data(), expected)
+
+def test_no_sessions():
+    assert process_performance_data([], engine="python") == []
+    assert process_performance_data([], engine="vectorized") == []
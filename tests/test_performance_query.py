@@ -0,0 +1,73 @@
+#tests/test_performance_query.py
+
+import json
+
+import pytest
+
+from db_logic import connect_to_db, fetch_performance_data, process_performance_data
+from test_performance_engines import assert_same_performance, generate_sessions
+
+# Details the Python engine accepts besides generate_sessions' own: JSON null, an empty
+# object, entries that are not objects, extra keys next to the score and integer scores
+EDGE_SESSIONS = [
+    (5001, 1, 80.0, True, "null"),
+    (5002, 1, 55.5, None, "{}"),
+    (5003, 1, None, False, '{"coding": 5, "notes": "none", "aptitude": {"score": 64, "max": 100}}'),
+    (5004, 2, 70.0, True, '{"zeta": {"score": 90}, "alpha": {"score": 69.99}}'),
+    (5005, 2, 69.0, True, '{"alpha": {"score": 71}, "beta": {"comment": "no score"}}'),
+]
+
+# Sessions in a temporary interviews_interviewsession, which shadows the real table for
+# this connection
+@pytest.fixture
+def conn():
+    try:
+        conn = connect_to_db()
+    except Exception as exc:
+        pytest.skip(f"No database configured: {exc}")
+    cur = conn.cursor()
+    cur.execute("""
+    CREATE TEMP TABLE interviews_interviewsession (
+        id integer PRIMARY KEY, pool_id integer, performance double precision, is_completed boolean, details json
+    );
+    """)
+    yield conn
+    conn.rollback()
+    conn.close()
+
+def insert(conn, sessions):
+    cur = conn.cursor()
+    cur.executemany(
+        "INSERT INTO interviews_interviewsession VALUES (%s, %s, %s, %s, %s);",
+        [
+            (session_id, pool_id, performance, is_completed,
+             details if isinstance(details, str) or details is None else json.dumps(details))
+            for session_id, pool_id, performance, is_completed, details in sessions
+        ]
+    )
+    cur.close()
+
+@pytest.mark.parametrize("seed", range(3))
+def test_matches_process_performance_data(conn, seed):
+    sessions = generate_sessions(1500, seed) + EDGE_SESSIONS
+    insert(conn, sessions)
+    pool_ids = list({session[1] for session in sessions})
+    expected = process_performance_data(sorted(sessions), engine="python")
+    # Same values, pools in order of first session, sub-categories in order of appearance
+    assert_same_performance(fetch_performance_data(conn, pool_ids), expected)
+
+def test_selected_pools_only(conn):
+    sessions = generate_sessions(300, seed=7) + EDGE_SESSIONS
+    insert(conn, sessions)
+    selected = [1, 2, 424242]
+    expected = process_performance_data(sorted(s for s in sessions if s[1] in selected), engine="python")
+    assert_same_performance(fetch_performance_data(conn, selected), expected)
+    assert fetch_performance_data(conn, [424242]) == []
+
+def test_sub_categories_keep_key_order(conn):
+    insert(conn, EDGE_SESSIONS)
+    performance = {pool['Pool ID']: pool for pool in fetch_performance_data(conn, [1, 2])}
+    assert list(performance[2]['Sub-Category Averages']) == ["zeta", "alpha"]
+    assert performance[2]['Sub-Category Averages']['alpha']['Number of Students Failed'] == 1
+    assert performance[1]['Average Score'] == pytest.approx((80.0 + 55.5) / 2)
+    assert performance[1]['Number of Students Not Completed'] == 2
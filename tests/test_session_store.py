@@ -0,0 +1,154 @@
+#tests/test_session_store.py
+
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+import db_logic
+from db_logic import SessionStore, process_performance_data
+
+# interviews_interviewsession stand-in: the store reads it through
+# iter_interview_sessions_since, which is answered from these rows
+class SessionsTable:
+    def __init__(self):
+        self.rows = {}  # id -> (id, pool_id, performance, is_completed, details)
+        self.reading = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def put(self, session_id, pool_id, performance, is_completed=True):
+        self.rows[session_id] = (session_id, pool_id, performance, is_completed, {"coding": {"score": performance}})
+
+    def since(self, conn, watermarks, updated_column=None, batch_size=None):
+        self.reading.set()
+        assert self.release.wait(5)
+        for session_id in sorted(self.rows):
+            row = self.rows[session_id]
+            if row[1] in watermarks:
+                last_id = watermarks[row[1]][0]
+                if last_id is None or session_id > last_id:
+                    yield row + (session_id,) if updated_column else row
+
+@pytest.fixture
+def table(monkeypatch):
+    table = SessionsTable()
+
+    @contextmanager
+    def connection():
+        yield None
+
+    monkeypatch.setattr(db_logic, "db_connection", connection)
+    monkeypatch.setattr(db_logic, "iter_interview_sessions_since", table.since)
+    return table
+
+def expected(table, pool_ids):
+    return process_performance_data([row for row in table.rows.values() if row[1] in pool_ids], engine="python")
+
+@pytest.mark.parametrize("retain_sessions", [True, False])
+def test_incremental_refresh_picks_up_new_rows(table, retain_sessions):
+    store = SessionStore(refresh_interval=0, retain_sessions=retain_sessions)
+    table.put(1, 10, 80.0)
+    table.put(2, 20, 50.0)
+    assert store.refresh([10, 20]) == 2
+    table.put(3, 10, 60.0)
+    assert store.refresh([10, 20]) == 1
+    assert store.performance_data([10, 20]) == expected(table, [10, 20])
+
+@pytest.mark.parametrize("retain_sessions", [True, False])
+def test_resync_picks_up_edited_and_late_rows(table, retain_sessions):
+    store = SessionStore(refresh_interval=0, retain_sessions=retain_sessions, resync_interval=0.05)
+    table.put(1, 10, 40.0, is_completed=False)
+    table.put(3, 10, 90.0)
+    store.refresh([10])
+    before = store.version([10])
+
+    # Session 1 completes and session 2 commits behind the higher id 3
+    table.put(1, 10, 75.0, is_completed=True)
+    table.put(2, 10, 65.0)
+    store.refresh([10])
+    assert store.performance_data([10]) != expected(table, [10])
+
+    time.sleep(0.06)
+    store.refresh([10])
+    assert store.performance_data([10]) == expected(table, [10])
+    assert store.version([10]) != before
+    if retain_sessions:
+        assert sorted(store.sessions([10])) == sorted(table.rows.values())
+
+def test_resync_drops_deleted_rows(table):
+    store = SessionStore(refresh_interval=0, resync_interval=0.05)
+    table.put(1, 10, 40.0)
+    table.put(2, 10, 90.0)
+    store.refresh([10])
+    del table.rows[1]
+    time.sleep(0.06)
+    store.refresh([10])
+    assert [session[0] for session in store.sessions([10])] == [2]
+
+def test_no_resync_with_updated_column(table):
+    store = SessionStore(refresh_interval=0, updated_column="updated", resync_interval=0.01)
+    table.put(1, 10, 40.0)
+    store.refresh([10])
+    time.sleep(0.02)
+    with store._lock:
+        assert not store._needs_resync(10, time.monotonic())
+
+def test_iter_sessions_streams_without_retained_rows(table):
+    store = SessionStore(refresh_interval=0, retain_sessions=False)
+    for session_id in [3, 1, 2]:
+        table.put(session_id, 10, 50.0)
+    table.put(4, 20, 50.0)
+    store.refresh([10, 20])
+    sessions = store.iter_sessions([10])
+    assert not isinstance(sessions, list)
+    assert [session[0] for session in sessions] == [1, 2, 3]
+
+    retained = SessionStore(refresh_interval=0)
+    retained.refresh([10])
+    assert isinstance(retained.iter_sessions([10]), list)
+
+def test_refresh_interval_skips_recent_pools(table):
+    store = SessionStore(refresh_interval=60)
+    table.put(1, 10, 40.0)
+    assert store.refresh([10]) == 1
+    table.put(2, 10, 50.0)
+    assert store.refresh([10]) == 0
+    assert store.refresh([10], force=True) == 1
+
+def test_readers_are_not_blocked_by_a_refresh(table):
+    store = SessionStore(refresh_interval=0)
+    table.put(1, 10, 40.0)
+    store.refresh([10])
+    table.put(2, 10, 50.0)
+
+    table.reading.clear()
+    table.release.clear()
+    refresh = threading.Thread(target=store.refresh, args=([10],))
+    refresh.start()
+    assert table.reading.wait(5)
+    # The query is still running; readers see the previous rows without waiting for it
+    started = time.monotonic()
+    assert [session[0] for session in store.sessions([10])] == [1]
+    store.version([10])
+    store.as_of([10])
+    assert time.monotonic() - started < 1
+    table.release.set()
+    refresh.join(5)
+    assert [session[0] for session in store.sessions([10])] == [1, 2]
+
+def test_invalidate_during_refresh_discards_the_rows(table):
+    store = SessionStore(refresh_interval=0)
+    table.put(1, 10, 40.0)
+    table.reading.clear()
+    table.release.clear()
+    refresh = threading.Thread(target=store.refresh, args=([10],))
+    refresh.start()
+    assert table.reading.wait(5)
+    store.invalidate()
+    table.release.set()
+    refresh.join(5)
+    assert store.sessions([10]) == []
+    assert store.refresh([10]) == 1
+    assert [session[0] for session in store.sessions([10])] == [1]
@@ -0,0 +1,145 @@
+#tests/test_shared_cache.py
+
+import os
+import pickle
+import stat
+import threading
+import time
+
+import pytest
+
+from shared_cache import FileBackend, LocalStore, NetworkBackend, get_or_load
+
+@pytest.fixture
+def backend(tmp_path):
+    return FileBackend(str(tmp_path / "cache"), namespace="test-v1")
+
+def test_directory_is_created_private(tmp_path):
+    FileBackend(str(tmp_path / "cache"))
+    assert stat.S_IMODE(os.stat(tmp_path / "cache").st_mode) == 0o700
+
+def test_directory_is_required():
+    with pytest.raises(ValueError):
+        FileBackend(None)
+
+def test_refuses_directory_writable_by_others(tmp_path):
+    directory = tmp_path / "cache"
+    directory.mkdir()
+    os.chmod(directory, 0o777)
+    with pytest.raises(PermissionError):
+        FileBackend(str(directory))
+
+def test_refuses_symlinked_directory(tmp_path):
+    (tmp_path / "real").mkdir(mode=0o700)
+    os.symlink(tmp_path / "real", tmp_path / "cache")
+    with pytest.raises(PermissionError):
+        FileBackend(str(tmp_path / "cache"))
+
+def test_set_and_get(backend):
+    assert backend.get("dataset", (1, "a")) is None
+    backend.set("dataset", (1, "a"), {"rows": [1, 2]}, stored_at=123.0)
+    assert backend.get("dataset", (1, "a")) == (123.0, {"rows": [1, 2]})
+    assert backend.get("dataset", (2, "a")) is None
+
+def test_delete_one_key_and_whole_dataset(backend):
+    for key in [(1,), (2,)]:
+        backend.set("dataset", key, key)
+    backend.delete("dataset", (1,))
+    assert backend.get("dataset", (1,)) is None
+    assert backend.get("dataset", (2,))[1] == (2,)
+    backend.delete("dataset")
+    assert backend.get("dataset", (2,)) is None
+
+def test_ignores_entry_writable_by_others(backend):
+    backend.set("dataset", (1,), "value")
+    path = backend._path("dataset", (1,), ".pkl")
+    os.chmod(path, 0o666)
+    assert backend.get("dataset", (1,)) is None
+
+def test_ignores_entries_older_than_max_age(tmp_path):
+    backend = FileBackend(str(tmp_path / "cache"), max_age=60)
+    backend.set("dataset", (1,), "value")
+    path = backend._path("dataset", (1,), ".pkl")
+    old = time.time() - 120
+    os.utime(path, (old, old))
+    assert backend.get("dataset", (1,)) is None
+
+def test_namespaces_are_separate(tmp_path):
+    FileBackend(str(tmp_path / "cache"), namespace="app-v1").set("dataset", (1,), "old shape")
+    assert FileBackend(str(tmp_path / "cache"), namespace="app-v2").get("dataset", (1,)) is None
+
+def test_unreadable_entry_is_a_miss(backend):
+    backend.set("dataset", (1,), "value")
+    with open(backend._path("dataset", (1,), ".pkl"), "wb") as f:
+        f.write(b"not a pickle")
+    assert backend.get("dataset", (1,)) is None
+
+@pytest.fixture(params=["file", "network"])
+def any_backend(request, tmp_path):
+    if request.param == "file":
+        return FileBackend(str(tmp_path / "cache"), namespace="test-v1")
+    return NetworkBackend(LocalStore(), namespace="test-v1")
+
+def test_get_or_load_miss_then_hit(any_backend):
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return "value"
+
+    value, stored_at, outcome = get_or_load(any_backend, "dataset", (1,), 60, loader)
+    assert (value, outcome) == ("value", "miss")
+    value, hit_stored_at, outcome = get_or_load(any_backend, "dataset", (1,), 60, loader)
+    assert (value, hit_stored_at, outcome) == ("value", stored_at, "hit")
+    assert len(calls) == 1
+
+def test_get_or_load_reloads_after_ttl(any_backend):
+    any_backend.set("dataset", (1,), "old", stored_at=time.time() - 120)
+    value, _, outcome = get_or_load(any_backend, "dataset", (1,), 60, lambda: "new")
+    assert (value, outcome) == ("new", "miss")
+    assert any_backend.get("dataset", (1,))[1] == "new"
+
+def test_get_or_load_without_ttl_never_reloads(any_backend):
+    any_backend.set("dataset", (1,), "old", stored_at=time.time() - 3600)
+    assert get_or_load(any_backend, "dataset", (1,), None, lambda: "new")[0] == "old"
+
+def test_concurrent_loads_are_coalesced(any_backend):
+    calls = []
+    started = threading.Event()
+
+    def loader():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return "value"
+
+    results = []
+    first = threading.Thread(target=lambda: results.append(get_or_load(any_backend, "dataset", (1,), 60, loader)))
+    first.start()
+    started.wait()
+    results.append(get_or_load(any_backend, "dataset", (1,), 60, loader))
+    first.join()
+    assert len(calls) == 1
+    assert sorted(outcome for _, _, outcome in results) == ["coalesced", "miss"]
+
+def test_loader_errors_propagate(any_backend):
+    def loader():
+        raise RuntimeError("query failed")
+
+    with pytest.raises(RuntimeError):
+        get_or_load(any_backend, "dataset", (1,), 60, loader)
+    assert any_backend.get("dataset", (1,)) is None
+
+def test_broken_backend_falls_back_to_loader():
+    class Broken:
+        def get(self, name, args):
+            raise ConnectionError("down")
+
+    assert get_or_load(Broken(), "dataset", (1,), 60, lambda: "value")[::2] == ("value", "miss")
+
+def test_network_backend_round_trips_pickles():
+    store = LocalStore()
+    backend = NetworkBackend(store, namespace="test-v1")
+    backend.set("dataset", (1,), [1, 2], stored_at=5.0)
+    assert pickle.loads(store.get(backend._key("dataset", (1,)))) == (5.0, [1, 2])
+    assert backend.get("dataset", (1,)) == (5.0, [1, 2])
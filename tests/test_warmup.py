@@ -0,0 +1,37 @@
+#tests/test_warmup.py
+
+import logging
+
+import pytest
+
+import warmup
+
+def test_refuses_to_run_without_a_shared_cache(monkeypatch, capsys):
+    monkeypatch.setattr(warmup, "get_backend", lambda: None)
+    monkeypatch.setattr(warmup, "warm_up", lambda *args: pytest.fail("warmed up without a shared cache"))
+    with pytest.raises(SystemExit) as exit_info:
+        warmup.main([])
+    assert exit_info.value.code == 2
+    assert "SHARED_CACHE" in capsys.readouterr().err
+
+def test_runs_with_a_shared_cache(monkeypatch, capsys):
+    calls = []
+    monkeypatch.setattr(warmup, "get_backend", lambda: object())
+    monkeypatch.setattr(warmup, "warm_up", lambda *args: calls.append(args) or {"interview_data": 0.5})
+    warmup.main(["--year", "22"])
+    assert calls == [(22, False)]
+    assert "Warm-up finished" in capsys.readouterr().out
+
+def test_start_warm_up_includes_sessions(monkeypatch):
+    calls = []
+    monkeypatch.setattr(warmup, "warm_up", lambda *args, **kwargs: calls.append((args, kwargs)) or {"cube": 1.0})
+    warmup.start_warm_up(22).join(5)
+    assert calls == [((22,), {"include_sessions": True})]
+
+def test_start_warm_up_logs_failures(monkeypatch, caplog):
+    def fail(*args, **kwargs):
+        raise RuntimeError("database down")
+    monkeypatch.setattr(warmup, "warm_up", fail)
+    with caplog.at_level(logging.ERROR, logger="warmup"):
+        warmup.start_warm_up().join(5)
+    assert "Warm-up failed" in caplog.text
@@ -0,0 +1,85 @@
+#warmup.py
+
+# Boot-time warm-up: loads the datasets every page starts from, so the first visitor after
+# a deploy doesn't pay for every query. Run it before starting the server; the server
+# processes then start from its results in the shared cache (see shared_cache.py), so it
+# refuses to run when SHARED_CACHE is none:
+#
+#   python warmup.py && streamlit run main.py
+#
+# The session store and the cube (see cube.py) are per process, so they are only warmed
+# with --sessions, or by start_warm_up() inside a dashboard process (WARMUP_ON_BOOT).
+
+import argparse
+import logging
+import threading
+import time
+
+from app import (
+    DEFAULT_BATCH_YEAR, get_student_counts, get_interview_data, get_categorized_students,
+    get_sub_category_performance, get_cube
+)
+from data_loader import load_datasets
+from shared_cache import get_backend
+
+logger = logging.getLogger(__name__)
+
+# Loads the shared datasets (concurrently once the pool list is in) and returns
+# {dataset: seconds from the start until it was ready}
+def warm_up(year=DEFAULT_BATCH_YEAR, include_sessions=False):
+    start = time.perf_counter()
+    interview_data = get_interview_data()
+    timings = {"interview_data": time.perf_counter() - start}
+    pool_ids = [row[0] for row in interview_data]
+
+    def ready(getter, *args):
+        def run():
+            getter(*args)
+            return time.perf_counter() - start
+        return run
+
+    specs = {
+        "student_counts": ready(get_student_counts),
+        "categorized_students": ready(get_categorized_students, pool_ids, year),
+        "sub_category_performance": ready(get_sub_category_performance, pool_ids),
+    }
+    if include_sessions:
+        specs["cube"] = ready(get_cube, pool_ids, year)
+    timings.update(load_datasets(specs))
+    return timings
+
+# Warms up the calling process in a background thread, sessions and cube included
+def start_warm_up(year=DEFAULT_BATCH_YEAR):
+    def run():
+        try:
+            timings = warm_up(year, include_sessions=True)
+        except Exception:
+            logger.exception("Warm-up failed")
+        else:
+            logger.info("Warm-up finished after %.2fs", max(timings.values()))
+
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prefetch the dashboard's shared datasets")
+    parser.add_argument("--year", type=int, default=DEFAULT_BATCH_YEAR, help="Batch year the candidate pages show")
+    parser.add_argument("--sessions", action="store_true", help="Also load interview sessions and build the cube in this process")
+    args = parser.parse_args(argv)
+
+    # Without a shared cache everything loaded here is dropped when the process exits
+    if get_backend() is None:
+        parser.exit(2, (
+            "warmup.py: no shared cache is configured (SHARED_CACHE=none), so the dashboard "
+            "could not use anything loaded here. Set SHARED_CACHE for both commands, or set "
+            "WARMUP_ON_BOOT=true to warm up inside the dashboard process instead.\n"
+        ))
+
+    start = time.perf_counter()
+    for name, seconds in sorted(warm_up(args.year, args.sessions).items(), key=lambda item: item[1]):
+        print(f"{name:<28} ready after {seconds:6.2f}s")
+    print(f"Warm-up finished in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()